@@ -0,0 +1,215 @@
+"""
+Matrices of fixed-width integers in a memory-mapped file.
+
+The SNF transforms of large modules are mostly machine-sized integers, but a DomainMatrix keeps a Python object
+per entry. An `Arena` stores such a matrix as a row-major block of signed 64-bit integers in one file, and
+`ArenaMatrix` is a handle to the block. Only GF(p) and ZZ matrices whose entries fit are stored; `Arena.store`
+returns None for anything else, and the caller keeps the matrix as it is.
+
+The file is mapped shared, so the operating system pages the entries in and out, and a handle pickled to a
+worker process maps the same file read-only there instead of copying the entries. Products with a stored
+matrix and its diagonal are computed from the rows directly; matrices that are materialized as DomainMatrix
+are kept in a per-process LRU cache bounded by `cache_entries`.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import tempfile
+import weakref
+from array import array
+from collections import OrderedDict
+
+from src.matrices import DMatrix
+
+_WIDTH = 8  # bytes per entry, array typecode "q"
+_MIN = -(1 << 63)
+_MAX = (1 << 63) - 1
+
+# Read-only maps of arena files opened through unpickled handles, per process.
+_opened: dict[str, mmap.mmap] = {}
+# Materialized matrices by (path, offset), least recently used first, and their total number of entries.
+_materialized: OrderedDict[tuple[str, int], DMatrix] = OrderedDict()
+_materialized_entries = 0
+cache_entries = 1 << 20
+
+
+def _cache_get(key: tuple[str, int]) -> DMatrix | None:
+    M = _materialized.get(key)
+    if M is not None:
+        _materialized.move_to_end(key)
+    return M
+
+
+def _cache_put(key: tuple[str, int], M: DMatrix):
+    global _materialized_entries
+    size = M.shape[0] * M.shape[1]
+    if size > cache_entries:
+        return
+    _materialized[key] = M
+    _materialized_entries += size
+    while _materialized_entries > cache_entries:
+        _, old = _materialized.popitem(last=False)
+        _materialized_entries -= old.shape[0] * old.shape[1]
+
+
+def _cache_drop(path: str):
+    global _materialized_entries
+    for key in [key for key in _materialized if key[0] == path]:
+        old = _materialized.pop(key)
+        _materialized_entries -= old.shape[0] * old.shape[1]
+
+
+def _close_maps(maps: list[mmap.mmap]):
+    """Close the maps that no view exports any more, and keep the others in the list."""
+    still_open = []
+    for mapped in maps:
+        try:
+            mapped.close()
+        except BufferError:
+            still_open.append(mapped)
+    maps[:] = still_open
+
+
+def _release(file, maps: list[mmap.mmap], path: str, owned: bool):
+    _close_maps(maps)
+    file.close()
+    _opened.pop(path, None)
+    _cache_drop(path)
+    if owned:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _entries(M: DMatrix) -> list[int] | None:
+    """The entries of M as row-major machine integers, or None if M cannot be stored."""
+    domain = M.domain
+    if domain.is_FiniteField:
+        if domain.characteristic() > _MAX:
+            return None
+        return [int(e) for e in M.to_list_flat()]
+    if domain.is_ZZ:
+        values = [int(e) for e in M.to_list_flat()]
+        if any(v < _MIN or v > _MAX for v in values):
+            return None
+        return values
+    return None
+
+
+def _mapped(path: str, end: int) -> mmap.mmap:
+    """A read-only map of an arena file that covers at least `end` bytes."""
+    mapped = _opened.get(path)
+    if mapped is None or len(mapped) < end:
+        if mapped is not None:
+            _close_maps([mapped])
+        with open(path, "rb") as f:
+            mapped = _opened[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped
+
+
+def _reopen(path: str, offset: int, shape: tuple[int, int], spec) -> ArenaMatrix:
+    from src.serialization import domain_from_spec
+
+    return ArenaMatrix(None, path, offset, shape, domain_from_spec(spec))
+
+
+class Arena:
+    """
+    An append-only store of integer matrices in a memory-mapped file that doubles in size when full.
+
+    A temporary file created for the arena (when no path is given) is removed by `close`, or when the arena is
+    garbage collected.
+    """
+
+    def __init__(self, path: str | None = None, capacity: int = 1 << 16):
+        owned = path is None
+        if owned:
+            fd, path = tempfile.mkstemp(prefix="spectral-sequence-", suffix=".arena")
+            os.close(fd)
+        self.path = path
+        self.capacity = max(capacity, 1)  # in entries
+        self.size = 0  # entries in use
+        self._file = open(path, "w+b")
+        _opened.pop(path, None)
+        _cache_drop(path)
+        self._file.truncate(self.capacity * _WIDTH)
+        self._map = mmap.mmap(self._file.fileno(), self.capacity * _WIDTH)
+        # Maps replaced by `_reserve` while a view still exported them; closed once the views are gone.
+        self._retired: list[mmap.mmap] = []
+        self._finalizer = weakref.finalize(self, _release, self._file, self._retired, path, owned)
+
+    def _reserve(self, count: int):
+        if self.size + count <= self.capacity:
+            return
+        while self.size + count > self.capacity:
+            self.capacity *= 2
+        self._file.truncate(self.capacity * _WIDTH)
+        self._retired.append(self._map)
+        self._map = mmap.mmap(self._file.fileno(), self.capacity * _WIDTH)
+        _close_maps(self._retired)
+
+    def store(self, M: DMatrix) -> ArenaMatrix | None:
+        values = _entries(M)
+        if values is None:
+            return None
+        self._reserve(len(values))
+        offset = self.size
+        self._map[offset * _WIDTH:(offset + len(values)) * _WIDTH] = array("q", values).tobytes()
+        self.size += len(values)
+        return ArenaMatrix(self, self.path, offset, M.shape, M.domain)
+
+    def close(self):
+        self._retired.append(self._map)
+        self._finalizer()
+
+
+class ArenaMatrix:
+    """A handle to a matrix stored in an arena."""
+
+    def __init__(self, arena: Arena | None, path: str, offset: int, shape: tuple[int, int], domain):
+        self.arena = arena
+        self.path = path
+        self.offset = offset
+        self.shape = tuple(shape)
+        self.domain = domain
+
+    def view(self) -> memoryview:
+        """The entries in row-major order, as a read-only view of the mapped file."""
+        start = self.offset * _WIDTH
+        end = start + self.shape[0] * self.shape[1] * _WIDTH
+        mapped = self.arena._map if self.arena is not None else _mapped(self.path, end)
+        return memoryview(mapped)[start:end].toreadonly().cast("q")
+
+    def rows(self) -> list[list[int]]:
+        m, n = self.shape
+        flat = self.view().tolist()
+        return [flat[i * n:(i + 1) * n] for i in range(m)]
+
+    def diagonal(self) -> list:
+        m, n = self.shape
+        view = self.view()
+        return [self.domain(view[i * n + i]) for i in range(min(m, n))]
+
+    def mul(self, M: DMatrix) -> DMatrix:
+        """The product of this matrix with M, computed over the integers from the rows of the file."""
+        domain = self.domain
+        assert M.domain == domain and M.shape[0] == self.shape[1]
+        columns = [[int(e) for e in column] for column in M.transpose().to_list()]
+        rows = [[domain(sum(a * b for a, b in zip(row, column) if a)) for column in columns] for row in self.rows()]
+        return DMatrix(rows, (self.shape[0], M.shape[1]), domain)
+
+    def to_dmatrix(self) -> DMatrix:
+        key = (self.path, self.offset)
+        M = _cache_get(key)
+        if M is None:
+            domain = self.domain
+            M = DMatrix([[domain(v) for v in row] for row in self.rows()], self.shape, domain)
+            _cache_put(key, M)
+        return M
+
+    def __reduce__(self):
+        from src.serialization import domain_spec
+
+        return _reopen, (self.path, self.offset, self.shape, domain_spec(self.domain))
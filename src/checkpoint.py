@@ -0,0 +1,246 @@
+"""
+Versioned on-disk checkpoints of a spectral sequence run.
+
+A checkpoint is a directory with two JSON files:
+
+- manifest.json describes the spectral sequence: format name and version, domain, generator names and
+  bidegrees, the differential bidegree coefficients, exponent caps, killed monomials and relations.
+- records.jsonl is an append-only log, one JSON object per line, written as the run makes progress:
+    {"kind": "page", "page": r, "supplied": ..., "interactive": ...}
+                                                              a page was added, with its supplied differentials
+    {"kind": "interactive", "page": r}                        values were entered interactively on a page
+    {"kind": "diff", "page": r, "src": ..., "tgt": ...}       a differential value became known
+    {"kind": "module", "page": r, "bidegree": [x, y], ...}    a module was computed (with its decompositions)
+    {"kind": "basis", "bidegree": [x, y], "monomials": ...}   an absolute basis was enumerated
+
+Polynomials are lists of [exponent, coefficient] terms, matrices are sparse {"shape", "entries"} objects, and
+scalars are integers, or strings for fractions. `SpectralSequence.resume` replays the log in order, so pages,
+differential data, modules and bases are restored as they were when the last complete line was written.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import json
+import os
+
+from sympy import GF, Integer, Poly, QQ, Rational, Symbol, ZZ
+
+from src.element import Bidegree, HomoElem
+from src.page_and_module import Module
+
+if TYPE_CHECKING:
+    from src.page_and_module import Page
+    from src.spectral_sequence import SpectralSequence
+
+FORMAT = "topology-spectral-sequence-checkpoint"
+VERSION = 1
+
+
+def encode_domain(domain) -> dict:
+    if domain.is_FiniteField:
+        return {"ring": "GF", "modulus": int(domain.characteristic())}
+    if domain == ZZ:
+        return {"ring": "ZZ"}
+    if domain == QQ:
+        return {"ring": "QQ"}
+    raise ValueError(f"Checkpoints support ZZ, QQ and GF(p), not {domain}.")
+
+
+def decode_domain(data: dict):
+    if data["ring"] == "GF":
+        return GF(data["modulus"])
+    return {"ZZ": ZZ, "QQ": QQ}[data["ring"]]
+
+
+def encode_scalar(value):
+    value = Rational(value)
+    return int(value) if value.q == 1 else str(value)
+
+
+def decode_scalar(value):
+    return Integer(value) if isinstance(value, int) else Rational(value)
+
+
+def encode_packed(packed) -> dict | None:
+    """A matrix in the plain form of src/serialization.py, as a sparse JSON object."""
+    if packed is None:
+        return None
+    shape, rows = packed
+    entries = [[i, j, encode_scalar(v)] for i, row in enumerate(rows) for j, v in enumerate(row) if v != 0]
+    return {"shape": list(shape), "entries": entries}
+
+
+def decode_packed(data: dict | None):
+    if data is None:
+        return None
+    m, n = data["shape"]
+    rows = [[Integer(0)] * n for _ in range(m)]
+    for i, j, v in data["entries"]:
+        rows[i][j] = decode_scalar(v)
+    return (m, n), rows
+
+
+def encode_module_data(data: dict) -> dict:
+    """The output of `Module.to_data`, as JSON."""
+    optional = lambda ms: None if ms is None else [encode_packed(m) for m in ms]  # noqa: E731
+    local = data.get("local")
+    return {"span": [encode_packed(c) for c in data["span"]],
+            "relations": [encode_packed(c) for c in data["relations"]],
+            "snf": optional(data["snf"]), "R_rel": optional(data["R_rel"]), "ambient": data.get("ambient"),
+            "local": None if local is None else [optional(columns) for columns in local]}
+
+
+def decode_module_data(data: dict) -> dict:
+    optional = lambda ms: None if ms is None else tuple(decode_packed(m) for m in ms)  # noqa: E731
+    local = data.get("local")
+    return {"span": [decode_packed(c) for c in data["span"]],
+            "relations": [decode_packed(c) for c in data["relations"]],
+            "snf": optional(data["snf"]), "R_rel": optional(data["R_rel"]), "ambient": data.get("ambient"),
+            "local": None if local is None else tuple([decode_packed(c) for c in columns] for columns in local)}
+
+
+def encode_poly(poly: Poly) -> list:
+    domain = poly.domain
+    return [[list(exponent), encode_scalar(domain.to_sympy(c))] for exponent, c in poly.terms() if c != domain.zero]
+
+
+def decode_poly(ss: SpectralSequence, terms: list) -> Poly:
+    return Poly.from_dict({tuple(e): ss.domain.from_sympy(decode_scalar(c)) for e, c in terms}, *ss.gen,
+                          domain=ss.domain)
+
+
+def describe(ss: SpectralSequence) -> dict:
+    """The data that determines E1 and the page bidegrees of a spectral sequence, as JSON."""
+    return {
+        "domain": encode_domain(ss.domain),
+        "generators": [str(g) for g in ss.gen],
+        "generator_bidegrees": [[int(v) for v in row] for row in ss.generator_bigrades.tolist()],
+        "diff_bidegree_coefficients": [[int(v) for v in row] for row in ss.diff_bideg_coef.tolist()],
+        "exponent_caps": list(ss.exponent_caps),
+        "killed_monomials": [list(e) for e in ss.killed_monomials],
+        "relations": [encode_poly(r) for r in ss.relations],
+    }
+
+
+class Checkpoint:
+    """Writes the records of one spectral sequence to a checkpoint directory as the run makes progress."""
+
+    def __init__(self, ss: SpectralSequence, path: str, append: bool = True):
+        self.ss = ss
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._records = open(os.path.join(path, "records.jsonl"), "a" if append else "w")
+
+    def write_manifest(self):
+        manifest = {"format": FORMAT, "version": VERSION, **describe(self.ss)}
+        tmp = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+
+    def _write(self, record: dict):
+        self._records.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._records.flush()
+
+    def record_page(self, page: Page):
+        self.write_manifest()
+        self._write({"kind": "page", "page": page.page_num, "supplied": page.supplied_diff,
+                     "interactive": page.interactive})
+
+    def record_interactive(self, page_num: int):
+        self._write({"kind": "interactive", "page": page_num})
+
+    def record_diff(self, page_num: int, src: HomoElem, tgt: HomoElem):
+        self._write({"kind": "diff", "page": page_num, "src": encode_poly(src.poly), "tgt": encode_poly(tgt.poly)})
+
+    def record_module(self, page_num: int, bidegree: Bidegree, module: Module):
+        record = {"kind": "module", "page": page_num, "bidegree": [int(bidegree[0]), int(bidegree[1])]}
+        if module.shared:
+            record["shared"] = True
+        else:
+            record["data"] = encode_module_data(module.to_data())
+        self._write(record)
+
+    def record_basis(self, bidegree: Bidegree, basis: tuple[tuple, ...]):
+        self._write({"kind": "basis", "bidegree": [int(bidegree[0]), int(bidegree[1])],
+                     "monomials": [list(e) for e in basis]})
+
+    def snapshot(self):
+        """Write the state reached so far, for a run that starts checkpointing after it began."""
+        self.write_manifest()
+        ss = self.ss
+        for bidegree, basis in ss.absolute_bases.items():
+            self.record_basis(bidegree, basis)
+        for page in ss.pages[1:]:
+            self.record_page(page)
+            for src, tgt in page.d.info.items():
+                self.record_diff(page.page_num, src, tgt)
+            for bidegree, module in page.modules.items():
+                self.record_module(page.page_num, bidegree, module)
+
+    def close(self):
+        self._records.close()
+
+
+def load(path: str) -> SpectralSequence:
+    """Rebuild a spectral sequence from a checkpoint directory; see `SpectralSequence.resume`."""
+    from src.spectral_sequence import SpectralSequence
+
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT or manifest.get("version") != VERSION:
+        raise ValueError(f"Unsupported checkpoint at {path}: {manifest.get('format')} version "
+                         f"{manifest.get('version')}, expected {FORMAT} version {VERSION}.")
+
+    gens = [Symbol(name) for name in manifest["generators"]]
+    ss = SpectralSequence(decode_domain(manifest["domain"]), gens, manifest["generator_bidegrees"],
+                          manifest["diff_bidegree_coefficients"])
+    ss.exponent_caps = list(manifest["exponent_caps"])
+    ss.killed_monomials = tuple(tuple(e) for e in manifest["killed_monomials"])
+    ss.relations = [decode_poly(ss, terms) for terms in manifest["relations"]]
+
+    records_path = os.path.join(path, "records.jsonl")
+    if not os.path.exists(records_path):
+        return ss
+    with open(records_path, "rb") as f:
+        content = f.read()
+    complete = content.rfind(b"\n") + 1
+    if complete < len(content):
+        # Drop a line cut short by a crash, so that appending resumes on a line boundary.
+        with open(records_path, "r+b") as f:
+            f.truncate(complete)
+    for line in content[:complete].decode().splitlines():
+        _replay(ss, json.loads(line))
+    return ss
+
+
+def _replay(ss: SpectralSequence, record: dict):
+    kind = record["kind"]
+    if kind == "page":
+        assert record["page"] == len(ss.pages), f"Checkpoint pages are out of order at page {record['page']}."
+        page = ss.add_page()
+        page.supplied_diff = record.get("supplied", [])
+        page.interactive = record.get("interactive", False)
+        return
+    if kind == "basis":
+        bidegree = Bidegree(record["bidegree"])
+        if bidegree not in ss.absolute_bases:
+            ss._store_abs_basis(bidegree, tuple(tuple(e) for e in record["monomials"]))
+        return
+
+    page: Page = ss.pages[record["page"]]
+    if kind == "interactive":
+        page.interactive = True
+    elif kind == "diff":
+        src = HomoElem(page, decode_poly(ss, record["src"]))
+        tgt = HomoElem(page, decode_poly(ss, record["tgt"]))
+        page.d._add_info_pair(src, tgt)
+    elif kind == "module":
+        bidegree = Bidegree(record["bidegree"])
+        if record.get("shared"):
+            module = Module.shared_from(page, ss.pages[page.page_num - 1][bidegree])
+        else:
+            module = Module.from_data(page, bidegree, decode_module_data(record["data"]))
+        page.store_module(bidegree, module)
+    else:
+        raise ValueError(f"Unknown checkpoint record kind {kind!r}.")
@@ -1,9 +1,16 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
+from bisect import bisect_left, bisect_right, insort
+from heapq import heappop, heappush
+from itertools import count
+from math import ceil, floor
+
 from src.snf import *
 from src.matrices import *
 from src.element import HomoElem, HomoCollection, Bidegree
+from src.scheduler import DIFF_SPAN
+from src.utilities import monomial_divides
 
 if TYPE_CHECKING:
     from src.page_and_module import Page
@@ -16,6 +23,18 @@ class DiffInfo:
     This class is add-only. It stores known source->target differential values,
     and keeps `lowest`: nontrivial known sources that are not currently recovered
     as products of known sources via divide/reverse-Leibniz inference.
+    Sources are also appended to a change log as they become known, so that consumers
+    can read only what is new since their last visit (see `changes_since`).
+
+    Inference runs on a worklist: a new fact is queued, and queued facts are taken in
+    ascending bidegree to apply the constant-divide and reverse-Leibniz rules, which may
+    queue further facts. A fact is queued once, when it becomes known, and each
+    (product, left) factorization is attempted at most once.
+
+    Lowest sources are indexed by bidegree, and the bidegrees by height and then first
+    component, so that only bidegrees that differ by a bidegree of some monomial are visited
+    and a division is only attempted where the quotient bidegree has monomials (see
+    `_divisors_of` and `_multiples_of`).
     """
 
     def __init__(self, differential: Differential):
@@ -25,7 +44,18 @@ class DiffInfo:
         self._info: dict[HomoElem, HomoElem] = {}
         self._info_by_bideg: dict[Bidegree, dict[HomoElem, HomoElem]] = {}
         self._lowest: set[HomoElem] = set()
+        # Lowest sources by bidegree, each with the exponents of its monomials.
+        self._lowest_by_bideg: dict[tuple[int, int], dict[HomoElem, tuple[tuple, ...]]] = {}
+        # The keys of _lowest_by_bideg: sorted heights, and the sorted first components at each height.
+        self._lowest_heights: list[int] = []
+        self._lowest_rows: dict[int, list[int]] = {}
         self._reason: dict[HomoElem, str] = {}
+        self._log: list[HomoElem] = []
+        self._worklist: list[tuple[tuple[int, int], int, HomoElem]] = []
+        self._tickets = count()
+        self._draining = False
+        # (product, left) -> whether product was factored through left; the outcome only depends on known values.
+        self._factored: dict[tuple[HomoElem, HomoElem], bool] = {}
 
     def __len__(self):
         return len(self._info)
@@ -51,15 +81,149 @@ class DiffInfo:
     def targets_at(self, bidegree: Bidegree):
         return list(self._info_by_bideg.get(bidegree, {}).values())
 
+    def changes_since(self, cursor: int) -> list[tuple[HomoElem, HomoElem]]:
+        """
+        Known values added after the first `cursor` ones, in the order they became known.
+
+        The log has `len(self)` entries, so a consumer that has read everything keeps `len(self)` as its cursor.
+        """
+        return [(src, self._info[src]) for src in self._log[cursor:]]
+
     def lowest_sources(self):
         return list(self._lowest)
 
     def lowest_sources_at(self, bidegree: Bidegree):
-        return [s for s in self._lowest if s.bidegree == bidegree]
+        return list(self._lowest_by_bideg.get(self._key(bidegree), {}))
 
     def reason_of(self, src: HomoElem):
         return self._reason.get(src)
 
+    @staticmethod
+    def _key(bidegree: Bidegree) -> tuple[int, int]:
+        return int(bidegree[0]), int(bidegree[1])
+
+    def _support(self, e: HomoElem) -> tuple[tuple, ...]:
+        """Exponents of the monomials of e in its absolute coordinates."""
+        ss = self.page.ss
+        return tuple(ss.get_abs_monomial(e.bidegree, i)
+                     for i, c in enumerate(e.coordinate.to_list_flat()) if c != self.domain.zero)
+
+    def _add_lowest(self, src: HomoElem):
+        if src not in self._lowest:
+            self._lowest.add(src)
+            key = self._key(src.bidegree)
+            if key not in self._lowest_by_bideg:
+                self._lowest_by_bideg[key] = {}
+                self._index_bidegree(key)
+            self._lowest_by_bideg[key][src] = self._support(src)
+
+    def _discard_lowest(self, src: HomoElem):
+        if src in self._lowest:
+            self._lowest.remove(src)
+            key = self._key(src.bidegree)
+            group = self._lowest_by_bideg[key]
+            del group[src]
+            if len(group) == 0:
+                del self._lowest_by_bideg[key]
+                x, y = key
+                row = self._lowest_rows[y]
+                del row[bisect_left(row, x)]
+                if len(row) == 0:
+                    del self._lowest_rows[y]
+                    del self._lowest_heights[bisect_left(self._lowest_heights, y)]
+
+    def _index_bidegree(self, key: tuple[int, int]):
+        x, y = key
+        if y not in self._lowest_rows:
+            insort(self._lowest_heights, y)
+            self._lowest_rows[y] = []
+        insort(self._lowest_rows[y], x)
+
+    def _least_slope(self):
+        """The least x / y over generators of bidegree (x, y) with y > 0, or None if there are none."""
+        return self.page.ss.monomial_counter.counter().least_slope[0]
+
+    def _groups_below(self, px: int, py: int):
+        """
+        The groups of lowest sources at bidegrees (x, y) with (px - x, py - y) in the cone of monomial bidegrees:
+        y <= py, and px - x >= (py - y) times the least slope.
+        """
+        slope = self._least_slope()
+        for y in self._lowest_heights[:bisect_right(self._lowest_heights, py)]:
+            if y < py and slope is None:
+                continue
+            row = self._lowest_rows[y]
+            bound = px if y == py else floor(px - (py - y) * slope)
+            for x in row[:bisect_right(row, bound)]:
+                yield (x, y), self._lowest_by_bideg[(x, y)]
+
+    def _groups_above(self, lx: int, ly: int):
+        """The groups of lowest sources at bidegrees (x, y) with (x - lx, y - ly) in the cone; see `_groups_below`."""
+        slope = self._least_slope()
+        for y in self._lowest_heights[bisect_left(self._lowest_heights, ly):]:
+            if y > ly and slope is None:
+                break
+            row = self._lowest_rows[y]
+            bound = lx if y == ly else ceil(lx + (y - ly) * slope)
+            for x in row[bisect_left(row, bound):]:
+                yield (x, y), self._lowest_by_bideg[(x, y)]
+
+    def _compares_supports(self, product: HomoElem) -> bool:
+        """
+        Whether left * q = product can only hold with every monomial of product divisible by one of left.
+
+        This is so when product has no relations at its bidegree and E1 is presented on monomials without a
+        Groebner basis, since normal forms then only delete killed monomials (and their multiples). Relations
+        are read from a resident module, or from the relations of E1 on the first page; no module is built
+        for this, and otherwise supports are not compared.
+        """
+        ss = self.page.ss
+        if ss.groebner_basis is not None:
+            return False
+        module = self.page.modules.get(product.bidegree)
+        if module is not None:
+            return module.relation.is_empty
+        return self.page.page_num == 1 and len(ss.get_ker_basis(product.bidegree)) == 0
+
+    @staticmethod
+    def _supports_divide(left: tuple[tuple, ...], product: tuple[tuple, ...]) -> bool:
+        return all(any(monomial_divides(m, e) for m in left) for e in product)
+
+    def _divisors_of(self, product: HomoElem) -> list[HomoElem]:
+        """
+        Lowest sources that may divide product with a nonzero quotient.
+
+        Where the quotient bidegree has no monomials, any quotient is zero and so of no use to inference.
+        """
+        ss = self.page.ss
+        px, py = self._key(product.bidegree)
+        product_support = self._support(product) if self._compares_supports(product) else None
+        res = []
+        for (x, y), group in self._groups_below(px, py):
+            if ss.get_abs_dimension(Bidegree([px - x, py - y])) == 0:
+                continue
+            for left, support in group.items():
+                if product_support is None or self._supports_divide(support, product_support):
+                    res.append(left)
+        return res
+
+    def _multiples_of(self, left: HomoElem) -> list[HomoElem]:
+        """Lowest sources that left may divide with a nonzero quotient; see `_divisors_of`."""
+        ss = self.page.ss
+        lx, ly = self._key(left.bidegree)
+        left_support = self._support(left)
+        res = []
+        for (x, y), group in self._groups_above(lx, ly):
+            if ss.get_abs_dimension(Bidegree([x - lx, y - ly])) == 0:
+                continue
+            compare = None
+            for product, support in group.items():
+                if compare is None:
+                    compare = self._compares_supports(product)  # the same for the whole bidegree
+                if not compare or self._supports_divide(left_support, support):
+                    res.append(product)
+        return res
+
     @staticmethod
     def _is_unique_kernel(K: DMatrix | None, domain) -> bool:
         if K is None:
@@ -107,10 +271,10 @@ class DiffInfo:
             return None
         return c
 
-    def _infer_from_constant_coeff(self, src: HomoElem, tgt: HomoElem, _seen: set[HomoElem]):
+    def _infer_from_constant_coeff(self, src: HomoElem, tgt: HomoElem):
         """
         If src = c * q with non-unit scalar c and both divides are unique,
-        infer d(q) = tgt / c and cache it recursively.
+        infer d(q) = tgt / c and queue it.
         """
         c = self._constant_content_nonunit(src)
         if c is None:
@@ -132,7 +296,6 @@ class DiffInfo:
             q_tgt,
             reason=f"const_divide:{c}",
             propagate=True,
-            _seen=_seen,
         )
 
     def _solve_unique(self, left: HomoElem, rhs: HomoElem, *, rhs_bideg: Bidegree | None = None):
@@ -194,8 +357,12 @@ class DiffInfo:
 
         return q0, dq0, kernel_pairs
 
-    def _try_factor_and_cache(self, product: HomoElem, left: HomoElem, _seen: set[HomoElem]):
+    def _try_factor_and_cache(self, product: HomoElem, left: HomoElem):
+        key = (product, left)
+        if key in self._factored:
+            return self._factored[key]
         recovered = self._recover_factors_via_left(product, left)
+        self._factored[key] = recovered is not None
         if recovered is None:
             return False
         q0, dq0, kernel_pairs = recovered
@@ -205,7 +372,6 @@ class DiffInfo:
             dq0,
             reason=f"reverse_leibniz:{left}|{product}",
             propagate=True,
-            _seen=_seen,
         )
         for k, dk in kernel_pairs:
             self.add_known(
@@ -213,44 +379,100 @@ class DiffInfo:
                 dk,
                 reason=f"reverse_leibniz_kernel:{left}|{product}",
                 propagate=True,
-                _seen=_seen,
             )
         return True
 
-    def _update_from_new_known(self, src: HomoElem, _seen: set[HomoElem]):
+    def _update_from_new_known(self, src: HomoElem):
         if not self._is_nontrivial(src):
-            self._lowest.discard(src)
+            self._discard_lowest(src)
             return
 
         represented_by_known = False
-        current_lowest = list(self._lowest)
-        for left in current_lowest:
+        for left in self._divisors_of(src):
             if left is src:
                 continue
             if left not in self._info:
                 continue
-            if self._try_factor_and_cache(src, left, _seen):
+            if self._try_factor_and_cache(src, left):
                 represented_by_known = True
 
         if represented_by_known:
-            self._lowest.discard(src)
+            self._discard_lowest(src)
         else:
-            self._lowest.add(src)
+            self._add_lowest(src)
 
         # Keep lowest as an anti-chain: if src can represent an old lowest
         # element through known factors, that old element is no longer lowest.
-        for old in list(self._lowest):
+        for old in self._multiples_of(src):
             if old is src:
                 continue
-            if old not in self._info:
-                self._lowest.discard(old)
-                continue
-            if self._try_factor_and_cache(old, src, _seen):
-                self._lowest.discard(old)
+            if self._try_factor_and_cache(old, src):
+                self._discard_lowest(old)
 
     def add(self, src: HomoElem, tgt: HomoElem) -> bool:
         return self.add_known(src, tgt, reason="manual", propagate=True)
 
+    def _check_consistent(self, src: HomoElem, known: HomoElem, tgt: HomoElem):
+        if known != tgt:
+            raise ValueError(
+                f"Conflicting differential data on page {self.page.page_num} at source bidegree {src.bidegree} "
+                f"for source {src}: {known} vs {tgt}."
+            )
+
+    def add_many(self, pairs: list[tuple[HomoElem, HomoElem]], *, reason: str = "manual") -> int:
+        """
+        Add known values together and run inference once over all of them.
+
+        The pairs are expected to be validated already (see `Differential.add_many`). A value that conflicts
+        with a known one, or with another pair, raises before anything is recorded. A conflict that only
+        inference runs into raises as well, after everything recorded by this call is rolled back.
+
+        Returns:
+            The number of new sources.
+        """
+        new: dict[HomoElem, HomoElem] = {}
+        for src, tgt in pairs:
+            known = self._info.get(src, new.get(src))
+            if known is not None:
+                self._check_consistent(src, known, tgt)
+                continue
+            new[src] = tgt
+
+        snapshot = self._snapshot()
+        try:
+            for src, tgt in new.items():
+                self.add_known(src, tgt, reason=reason, propagate=False, validate=False)
+                self._queue(src)
+            if not self._draining:
+                self._drain()
+        except Exception:
+            self._rollback(snapshot)
+            raise
+        return len(new)
+
+    def _snapshot(self) -> tuple:
+        """What `_rollback` needs to undo later additions: known values and memos only grow, the rest is copied."""
+        lowest_by_bideg = {key: dict(group) for key, group in self._lowest_by_bideg.items()}
+        return len(self._log), len(self._factored), set(self._lowest), lowest_by_bideg, list(self._worklist)
+
+    def _rollback(self, snapshot: tuple):
+        """Forget the values recorded and the inference done since `snapshot` was taken."""
+        logged, factored, lowest, lowest_by_bideg, worklist = snapshot
+        for src in self._log[logged:]:
+            del self._info[src]
+            group = self._info_by_bideg[src.bidegree]
+            del group[src]
+            if len(group) == 0:
+                del self._info_by_bideg[src.bidegree]
+            del self._reason[src]
+        del self._log[logged:]
+        for key in list(self._factored)[factored:]:
+            del self._factored[key]
+        self._lowest, self._lowest_by_bideg, self._worklist = lowest, lowest_by_bideg, worklist
+        self._lowest_heights, self._lowest_rows = [], {}
+        for key in lowest_by_bideg:
+            self._index_bidegree(key)
+
     def add_known(
         self,
         src: HomoElem,
@@ -258,21 +480,21 @@ class DiffInfo:
         *,
         reason: str = "manual",
         propagate: bool = True,
-        _seen: set[HomoElem] | None = None,
+        validate: bool = True,
     ) -> bool:
         """
         Add one known differential value and optionally propagate inference.
 
+        With `propagate`, the value is queued, and the worklist is drained unless this is called from a rule
+        while it is being drained. `validate` can be turned off for values validated in a batch.
+
         Returns:
             True iff this source is newly added.
         """
-        self.differential._validate_io_pair(src, tgt)
+        if validate:
+            self.differential._validate_io_pair(src, tgt)
         if src in self._info:
-            if self._info[src] != tgt:
-                raise ValueError(
-                    f"Conflicting differential data on page {self.page.page_num} at source bidegree {src.bidegree} "
-                    f"for source {src}: {self._info[src]} vs {tgt}."
-                )
+            self._check_consistent(src, self._info[src], tgt)
             return False
 
         self._info[src] = tgt
@@ -280,26 +502,43 @@ class DiffInfo:
             self._info_by_bideg[src.bidegree] = {}
         self._info_by_bideg[src.bidegree][src] = tgt
         self._reason[src] = reason
+        self._log.append(src)
 
         if propagate:
-            if _seen is None:
-                _seen = set()
-            if src in _seen:
-                return True
-            _seen.add(src)
-            try:
-                self._infer_from_constant_coeff(src, tgt, _seen)
-                self._update_from_new_known(src, _seen)
-            finally:
-                _seen.remove(src)
+            self._queue(src)
+            if not self._draining:
+                self._drain()
         return True
 
-    def query_d(self, src: HomoElem, _seen: set[HomoElem] | None = None):
+    @staticmethod
+    def _order(src: HomoElem) -> tuple[int, int]:
+        if src.bidegree is None:
+            return -1, -1
+        return int(src.bidegree[0] + src.bidegree[1]), int(src.bidegree[0])
+
+    def _queue(self, src: HomoElem):
+        heappush(self._worklist, (self._order(src), next(self._tickets), src))
+
+    def _drain(self):
+        """Apply the inference rules to queued facts, lowest bidegree first, until the worklist is empty."""
+        self._draining = True
+        try:
+            while self._worklist:
+                _, _, src = heappop(self._worklist)
+                self._infer_from_constant_coeff(src, self._info[src])
+                self._update_from_new_known(src)
+        finally:
+            self._draining = False
+
+    def query_d(self, src: HomoElem):
         """
         Try to compute d(src) from known values by product decomposition
         against lowest-level elements.
 
         On success, caches the result through add_known(..., reason="query").
+        Quotients and kernel generators are queried on an explicit stack: each pending
+        query is a `_query` generator that yields the sources it needs and is resumed
+        with their values (None if unknown).
         """
         known = self._info.get(src)
         if known is not None:
@@ -307,15 +546,29 @@ class DiffInfo:
         if src.isZero():
             return HomoElem(self.page, 0)
 
-        if _seen is None:
-            _seen = set()
-        if src in _seen:
-            return None
-
-        _seen.add(src)
+        seen: set[HomoElem] = set()
+        stack = [self._query(src, seen)]
+        result = None
+        while stack:
+            try:
+                needed = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+            result = self._info.get(needed)
+            if result is None and needed.isZero():
+                result = HomoElem(self.page, 0)
+            if result is None and needed not in seen:
+                stack.append(self._query(needed, seen))
+        return result
+
+    def _query(self, src: HomoElem, seen: set[HomoElem]):
+        """The steps of `query_d` for one unknown source; `seen` holds the sources being queried."""
+        seen.add(src)
         try:
             target_bideg = src.bidegree + self.differential.d_bidegree
-            for left in list(self._lowest):
+            for left in self._divisors_of(src):
                 d_left = self._info.get(left)
                 if d_left is None:
                     continue
@@ -328,7 +581,7 @@ class DiffInfo:
                 if not self._is_nontrivial(q0):
                     continue
 
-                dq0 = self.query_d(q0, _seen)
+                dq0 = yield q0
                 if dq0 is None:
                     continue
 
@@ -336,7 +589,7 @@ class DiffInfo:
                 dk_map: dict[HomoElem, HomoElem] = {}
                 ok = True
                 for k in self._kernel_gens(q_bideg, Kq):
-                    dk = self.query_d(k, _seen)
+                    dk = yield k
                     if dk is None:
                         ok = False
                         break
@@ -353,11 +606,12 @@ class DiffInfo:
                 if not ok:
                     continue
 
-                self.add_known(src, candidate, reason="query", propagate=True, _seen=_seen)
+                # Values found by a query are recorded without running the inference rules on them.
+                self.add_known(src, candidate, reason="query", propagate=False)
                 return self._info[src]
             return None
         finally:
-            _seen.remove(src)
+            seen.remove(src)
 
 
 class Differential:
@@ -370,58 +624,108 @@ class Differential:
         # src -> d(src), plus bidegree-indexed views for fast lookups.
         self.info: dict[HomoElem, HomoElem] = {}
         self.info_by_bideg: dict[Bidegree, dict[HomoElem, HomoElem]] = {}
+        # Number of entries of the DiffInfo change log already merged into the mirrors above.
+        self._merged = 0
         self.info_collections: dict[Bidegree, HomoCollection] = {}
         # Cache: source bidegree -> d(source span generators) as a HomoCollection.
         self.diff_span_cache: dict[Bidegree, HomoCollection] = {}
+        # Cached entries dropped because a value at their bidegree became known, and spans computed again
+        # after being dropped.
+        self.invalidations = 0
+        self.recomputations = 0
+        self._invalidated: set[Bidegree] = set()
 
         # Safeguard against contradictory input-output data.
-        for key, value in io_pairs.items():
-            src = HomoElem(page, key)
-            tgt = HomoElem(page, value)
-            self._add_info_pair(src, tgt)
-
+        pairs = [(HomoElem(page, key), HomoElem(page, value)) for key, value in io_pairs.items()]
         # In a unital setting, d(1) = 0 should always hold.
-        unit_src = HomoElem(page, 1)
-        unit_tgt = HomoElem(page, 0)
-        self._add_info_pair(unit_src, unit_tgt)
+        pairs.append((HomoElem(page, 1), HomoElem(page, 0)))
+        self.add_many(pairs)
+
+    def add_many(self, pairs) -> int:
+        """
+        Insert many known differential values with one validation pass and one inference pass.
+
+        Sources and targets are grouped by bidegree and classified in one batch per module (see
+        `Module.classify_many`), then all values are recorded and inference runs once over them (see
+        `DiffInfo.add_many`). Nothing is recorded if some pair is invalid or conflicting, including conflicts
+        that only inference from the pairs runs into.
+
+        Args:
+            pairs: a dict or an iterable of (source, target) pairs of HomoElem.
+
+        Return:
+            The number of new sources.
+        """
+        if isinstance(pairs, dict):
+            pairs = pairs.items()
+        pairs = list(pairs)
+        self._validate_io_pairs(pairs)
+        added = self.diff_info.add_many(pairs, reason="manual")
+        self._merge_from_diff_info()
+        return added
+
+    def _classify_grouped(self, elems: list[HomoElem]) -> dict[int, int]:
+        """Classify nonzero elements in their modules, one batch per bidegree; keyed by position in elems."""
+        groups: dict[tuple[int, int], list[int]] = {}
+        for i, e in enumerate(elems):
+            if e is not None and not e.isZero():
+                groups.setdefault((int(e.bidegree[0]), int(e.bidegree[1])), []).append(i)
+        status = {}
+        for indices in groups.values():
+            bidegree = elems[indices[0]].bidegree
+            M = HomoCollection(page=self.page, bideg=bidegree, coords=[elems[i].coordinate for i in indices])
+            for i, st in zip(indices, self.page[bidegree].classify_many(M.to_matrix())):
+                status[i] = st
+        return status
 
     def _validate_io_pair(self, src: HomoElem, tgt: HomoElem):
         """Validate one user-provided differential pair for obvious contradictions."""
-        if src.isZero():
-            if not tgt.isZero():
+        self._validate_io_pairs([(src, tgt)])
+
+    def _validate_io_pairs(self, pairs: list[tuple[HomoElem, HomoElem]]):
+        """Validate user-provided differential pairs for obvious contradictions, raising on the first invalid one."""
+        for src, tgt in pairs:
+            if src.isZero():
+                if not tgt.isZero():
+                    raise ValueError(
+                        f"Invalid differential data on page {self.page.page_num} at bidegree {src.bidegree}: "
+                        f"d(0) must be 0, but got {tgt}."
+                    )
+                continue
+
+            target_bideg = src.bidegree + self.d_bidegree
+            if not tgt.isZero() and tgt.bidegree != target_bideg:
                 raise ValueError(
-                    f"Invalid differential data on page {self.page.page_num} at bidegree {src.bidegree}: "
-                    f"d(0) must be 0, but got {tgt}."
+                    f"Invalid differential data bidegree mismatch on page {self.page.page_num} "
+                    f"at source bidegree {src.bidegree}: "
+                    f"d({src}) should land in bidegree {target_bideg}, but got {tgt.bidegree}."
                 )
-            return
-
-        target_bideg = src.bidegree + self.d_bidegree
-        if not tgt.isZero() and tgt.bidegree != target_bideg:
-            raise ValueError(
-                f"Invalid differential data bidegree mismatch on page {self.page.page_num} "
-                f"at source bidegree {src.bidegree}: "
-                f"d({src}) should land in bidegree {target_bideg}, but got {tgt.bidegree}."
-            )
 
-        src_status = self.page[src.bidegree].classify(src.coordinate)
-        if src_status == 2:
-            raise ValueError(
-                f"Invalid differential data on page {self.page.page_num} at source bidegree {src.bidegree}: "
-                f"{src} does not represent an element of the source module."
-            )
+        src_statuses = self._classify_grouped([src for src, _ in pairs])
+        target_statuses = self._classify_grouped([None if src.isZero() else tgt for src, tgt in pairs])
+        for i, (src, tgt) in enumerate(pairs):
+            if src.isZero():
+                continue
+            target_bideg = src.bidegree + self.d_bidegree
+            src_status = src_statuses[i]
+            if src_status == 2:
+                raise ValueError(
+                    f"Invalid differential data on page {self.page.page_num} at source bidegree {src.bidegree}: "
+                    f"{src} does not represent an element of the source module."
+                )
 
-        target_status = 0 if tgt.isZero() else self.page[target_bideg].classify(tgt.coordinate)
-        if target_status == 2:
-            raise ValueError(
-                f"Invalid differential data on page {self.page.page_num} at source bidegree {src.bidegree}: "
-                f"{tgt} does not represent an element of the target module at bidegree {target_bideg}."
-            )
+            target_status = target_statuses.get(i, 0)
+            if target_status == 2:
+                raise ValueError(
+                    f"Invalid differential data on page {self.page.page_num} at source bidegree {src.bidegree}: "
+                    f"{tgt} does not represent an element of the target module at bidegree {target_bideg}."
+                )
 
-        if src_status == 0 and target_status != 0:
-            raise ValueError(
-                f"Invalid differential data on page {self.page.page_num} at source bidegree {src.bidegree}: "
-                f"{src} is zero in the source module, so its differential must be zero in the target module."
-            )
+            if src_status == 0 and target_status != 0:
+                raise ValueError(
+                    f"Invalid differential data on page {self.page.page_num} at source bidegree {src.bidegree}: "
+                    f"{src} is zero in the source module, so its differential must be zero in the target module."
+                )
 
     def _add_info_pair(self, src: HomoElem, tgt: HomoElem) -> bool:
         """
@@ -430,48 +734,44 @@ class Differential:
         Return:
             True iff a new source was added.
         """
-        self._validate_io_pair(src, tgt)
-        # Keep mirrors synchronized in case DiffInfo inferred values recursively.
-        self._merge_from_diff_info()
-        if src in self.info:
-            if self.info[src] != tgt:
-                raise ValueError(
-                    f"Conflicting differential data on page {self.page.page_num} at source bidegree {src.bidegree} "
-                    f"for source {src}: {self.info[src]} vs {tgt}."
-                )
-            return False
-
-        added = self.diff_info.add_known(src, tgt, reason="manual", propagate=True)
-        self._merge_from_diff_info()
-        return added
+        return self.add_many([(src, tgt)]) == 1
 
     def _merge_from_diff_info(self) -> bool:
         """
         Merge knowledge inferred/stored in DiffInfo into Differential mirrors.
 
+        Only the entries of the DiffInfo change log past `_merged` are read, so ingesting N values costs O(N)
+        in total however often this is called. DiffInfo rejects conflicting values, so new entries never
+        contradict the mirrors.
+
+        Cached entries are dropped only at the bidegrees of new sources: the info collection at b is built from
+        the values at b, and d(S) at b is inferred from that collection and from values of the span generators
+        at b (including those `query_d` finds elsewhere, which are added at b).
+
         Returns:
             True iff any new source was merged.
         """
-        changed = False
-        for src, tgt in self.diff_info.items():
-            if src in self.info:
-                if self.info[src] != tgt:
-                    raise ValueError(
-                        f"Conflicting differential data on page {self.page.page_num} at source bidegree {src.bidegree} "
-                        f"for source {src}: {self.info[src]} vs {tgt}."
-                    )
-                continue
+        new = self.diff_info.changes_since(self._merged)
+        if len(new) == 0:
+            return False
+        self._merged += len(new)
+        for src, tgt in new:
             self.info[src] = tgt
             if src.bidegree not in self.info_by_bideg:
                 self.info_by_bideg[src.bidegree] = {}
             self.info_by_bideg[src.bidegree][src] = tgt
-            changed = True
+            if self.page.ss.checkpoint is not None:
+                self.page.ss.checkpoint.record_diff(self.page.page_num, src, tgt)
+            self._invalidate(src.bidegree)
+        return True
 
-        if changed:
-            # New knowledge can affect all cached slices and inferred spans.
-            self.info_collections.clear()
-            self.diff_span_cache.clear()
-        return changed
+    def _invalidate(self, bidegree: Bidegree):
+        """Drop the cached info collection and differential span at one bidegree."""
+        if self.info_collections.pop(bidegree, None) is not None:
+            self.invalidations += 1
+        if self.diff_span_cache.pop(bidegree, None) is not None:
+            self.invalidations += 1
+            self._invalidated.add(bidegree)
 
     def info_collection_at(self, bidegree):
         """Gather the known information correspond to the specified bidegree."""
@@ -587,10 +887,13 @@ class Differential:
             y = HomoCollection(page=self.page, bideg=target_bideg, elems=[e for e in y_elems if e is not None])
             return y, []
 
-        I_M = I.to_matrix()
+        # S is written relative to the ambient basis, so I is aligned with it there.
+        I_M = module.to_ambient(I.to_matrix())
+        if I_M is None:
+            raise ValueError(f"Info set at bidegree {bidegree} is not in the span of the module.")
         P, Q, D = SNF.align(I_M, module.S)
         rhs = d_I * P
-        transformed_sources = HomoCollection.from_matrix(self.page, bidegree, module.S * Q)
+        transformed_sources = HomoCollection.from_matrix(self.page, bidegree, module.span.to_matrix() * Q)
 
         n, m = D.shape
         diag_len = min(n, m)
@@ -677,7 +980,7 @@ class Differential:
         module = self.page[bidegree]
         target_bideg = bidegree + self.d_bidegree
         if module.span.is_empty:
-            self.diff_span_cache[bidegree] = HomoCollection(page=self.page, bideg=target_bideg, coords=[])
+            self._cache_diff_span(bidegree, HomoCollection(page=self.page, bideg=target_bideg, coords=[]))
             return []
 
         added_pairs: list[tuple[HomoElem, HomoElem]] = []
@@ -694,7 +997,7 @@ class Differential:
 
             dS, missing_sources = self._infer_diff_span_from_current_info(bidegree)
             if dS is not None:
-                self.diff_span_cache[bidegree] = dS
+                self._cache_diff_span(bidegree, dS)
                 return added_pairs
 
             inferred_any = False
@@ -707,6 +1010,8 @@ class Differential:
                 self._merge_from_diff_info()
                 continue
 
+            # Entered values are not part of what identifies this page in a result store.
+            self.page.mark_interactive()
             gens = ", ".join(str(g) for g in self.page.ss.gen)
             print(
                 f"Need {len(missing_sources)} additional differential value(s) on page {self.page.page_num} "
@@ -732,7 +1037,15 @@ class Differential:
                     f"no new information was added but d(S) is still ambiguous."
                 )
 
+    def _cache_diff_span(self, bidegree, dS: HomoCollection):
+        if bidegree in self._invalidated:
+            self._invalidated.discard(bidegree)
+            self.recomputations += 1
+        self.diff_span_cache[bidegree] = dS
+        if self.page.ss.result_store is not None:
+            self.page.ss.result_store.save_diff_span(self.page, bidegree, dS)
+
     def get_diff_span(self, bidegree):
         if bidegree not in self.diff_span_cache:
-            self.complete_info_set(bidegree)
+            self.page.ss.scheduler.run([(self.page, DIFF_SPAN, (int(bidegree[0]), int(bidegree[1])))])
         return self.diff_span_cache[bidegree]
@@ -48,18 +48,21 @@ class HomoElem:
 
             self.bidegree = abs_bideg
             self.coordinate = abs_coordinate
-            # build the polynomial from coordinate
+            # build the polynomial from coordinate, looking up only the monomials that occur
             poly_dict = {}
-            abs_basis = ss.get_abs_basis(abs_bideg)
-            for i, exponent in enumerate(abs_basis):
-                poly_dict[exponent] = abs_coordinate[i].element
+            for i, c in enumerate(abs_coordinate.to_list_flat()):
+                if c != ss.domain.zero:
+                    poly_dict[ss.get_abs_monomial(abs_bideg, i)] = c
             self.poly = Poly.from_dict(poly_dict, *ss.gen, domain=ss.domain)
         else:
             assert abs_coordinate is None
             assert abs_bideg is None
 
-            self.poly = Poly(expr, *ss.gen, domain=ss.domain)
-            self.bidegree, self.coordinate = ss.get_abs_info(self.poly)
+            poly = Poly(expr, *ss.gen, domain=ss.domain)
+            self.bidegree, self.coordinate = ss.get_abs_info(poly)
+            # With a Groebner basis, equal classes get equal polynomials (see SpectralSequence.normal_form). The
+            # bidegree is still read off the given polynomial, so a relation keeps it with a zero coordinate.
+            self.poly = ss.normal_form(poly)
 
     def isZero(self):
         """This only cares about if the element is literally zero. We don't consider relations here."""
@@ -62,7 +62,8 @@ def build_data_dict(min_x, max_x, min_y, max_y):
         "edges": [],
     }
 
-    # Walk the given rectangle of bidegrees.
+    # Build the page on the rectangle in parallel, then walk its bidegrees.
+    p4.compute_region((range(min_x, max_x + 1), range(min_y, max_y + 1)), workers=os.cpu_count())
     for x in range(min_x, max_x + 1):
         for y in range(min_y, max_y + 1):
             try:
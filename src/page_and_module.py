@@ -2,10 +2,15 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from src.snf import *
+from src.arena import ArenaMatrix
 from src.matrices import *
 from src.differential import Differential
 from src.element import Bidegree, HomoElem, HomoCollection
+from src.scheduler import MODULE
+from src.serialization import domain_spec, pack, pack_columns, unpack, unpack_columns
+from collections import OrderedDict
 from collections.abc import Iterable
+from functools import cached_property
 
 if TYPE_CHECKING:
     from src.spectral_sequence import SpectralSequence
@@ -13,54 +18,371 @@ if TYPE_CHECKING:
 _verify = True
 
 
+def relative_coordinates(S: SNFMatrix, rank: int, M: DMatrix) -> DMatrix | None:
+    """
+    Express the columns of M in the coordinates of the basis of Col(S) given by the first `rank` columns of S * V.
+
+    Since that basis is U^{-1} * D[:, :rank], a column v equals basis * c exactly when U * v vanishes below
+    `rank` and d_i * c_i = (U * v)_i above it. Return None if some column is outside the span.
+    """
+    domain = S.domain
+    rows = S.U_mul(M).to_list()
+    if any(a != domain.zero for row in rows[rank:] for a in row):
+        return None
+    if rank == 0:
+        return DMatrix.zeros((0, M.shape[1]), domain)
+
+    diag = S.D_diagonal()
+    rel_rows = []
+    for i in range(rank):
+        d = diag[i]
+        if any(domain.rem(a, d) != domain.zero for a in rows[i]):
+            return None
+        rel_rows.append([domain.exquo(a, d) for a in rows[i]])
+    return DMatrix.from_list(rel_rows, domain)
+
+
+def column_coordinates(S: SNFMatrix, rank: int, M: DMatrix) -> list[list | None]:
+    """
+    `relative_coordinates` column by column: the coordinates of each column of M as a list, or None for a
+    column outside the span. One product U * M serves the whole block.
+    """
+    domain = S.domain
+    rows = S.U_mul(M).to_list()
+    diag = S.D_diagonal()
+    res = []
+    for j in range(M.shape[1]):
+        if any(rows[i][j] != domain.zero for i in range(rank, len(rows))):
+            res.append(None)
+            continue
+        coords = []
+        for i in range(rank):
+            if domain.rem(rows[i][j], diag[i]) != domain.zero:
+                coords = None
+                break
+            coords.append(domain.exquo(rows[i][j], diag[i]))
+        res.append(coords)
+    return res
+
+
+def diff_kernel_coefficients(dS_M: DMatrix, dS_rel: DMatrix | None, target_R: DMatrix | None,
+                             target_R_rel: DMatrix | None) -> DMatrix:
+    """
+    Coefficients u of the source span generators whose image d(S) * u vanishes in the target module.
+
+    We solve d(S) * u - R' * v = 0 by taking the kernel of [d(S) | -R'] and projecting to the u-part. Both blocks
+    are written relative to the target basis when d(S) lies in the target span (`dS_rel`, with `target_R_rel`),
+    and in absolute coordinates otherwise.
+    """
+    n = dS_M.shape[1]
+    if dS_rel is not None:
+        dS_M, relations = dS_rel, target_R_rel
+    else:
+        relations = target_R
+    if relations is None:
+        block = dS_M
+    else:
+        block = DMatrix.static_hstack(dS_M, -relations)
+
+    ker_block = SNF.kernel_of(block)
+    return ker_block.extract(list(range(n)), list(range(ker_block.shape[1])))
+
+
+def next_page_coordinates(S: SNFMatrix, rank: int, R_rel: DMatrix | None, ker_coeff: DMatrix,
+                          incoming_rel: DMatrix | None) -> tuple[list[DMatrix], list[DMatrix]]:
+    """
+    Span and relation columns of a module of E_{r+1}, relative to the basis of the module of E_r it comes from.
+
+    S (of `rank`) and R_rel belong to the E_r module, `ker_coeff` are the coefficients of ker(d_r) on the columns
+    of S and `incoming_rel` is the image of the incoming d_r relative to the same basis. The span is ker(d_r)
+    joined with the old relations, and the relations are the incoming image joined with the old relations; every
+    column has `rank` entries.
+    """
+    old_relations = [] if R_rel is None else DMatrix.from_rep(R_rel.rep).columns()
+    kernel = relative_coordinates(S, rank, DMatrix.from_rep(S.rep) * ker_coeff)
+    assert kernel is not None
+    incoming = [] if incoming_rel is None else incoming_rel.columns()
+    return kernel.columns() + old_relations, incoming + old_relations
+
+
 class Module:
-    def __init__(self, page: Page, bidegree, span_set: Iterable[DMatrix], relation_set: Iterable[DMatrix]):
+    def __init__(self, page: Page, bidegree, span_set: Iterable[DMatrix], relation_set: Iterable[DMatrix],
+                 snf: tuple[DMatrix, DMatrix, DMatrix] | None = None, ambient: Module | int | None = None,
+                 local: tuple[list[DMatrix], list[DMatrix]] | None = None):
+        """
+        `span_set` and `relation_set` are in absolute coordinates. S is the span matrix the module decomposes: the
+        absolute span itself, or with `ambient`, the module of this bidegree on an earlier page that contains this
+        one (or the number of that page), the columns of `local` = (span, relations) written relative to the basis
+        of `ambient`. S and everything decomposed from it then have the rank of `ambient` as their number of rows,
+        and absolute coordinates are only used for the `span` and `relation` collections and `basis`.
+
+        If `snf` is given, it is the (D, U, V) decomposition of S, already computed elsewhere.
+        """
         self.page = page
         self.bideg = bidegree
         self.domain = self.page.domain
         self.dim = None  # TODO: compute dim from bideg
+        # Whether this module was taken over unchanged from the previous page (see shared_from).
+        self.shared = False
         self.span = HomoCollection(page=page, bideg=bidegree, coords=span_set)
-        self.S = self.span.to_SNF_matrix()
         self.relation = HomoCollection(page=page, bideg=bidegree, coords=relation_set)
-        self.R = self.relation.to_SNF_matrix()
+        # Relations are kept undecomposed in absolute coordinates; queries go through R_rel instead.
+        self.R = self.relation.to_matrix()
+        if ambient is None:
+            self.ambient_page = None
+            local_span, local_relations = self.span.coords, self.relation.coords
+        else:
+            if isinstance(ambient, Module):
+                self.ambient_page = ambient.page.page_num
+                # Known already, so neither has to be looked up on the ambient page later.
+                self.__dict__["ambient_steps"] = ambient.steps
+                self.__dict__["ambient_basis"] = ambient.basis
+            else:
+                self.ambient_page = ambient
+            local_span, local_relations = local
+        if len(local_span) == 0:
+            self.S = None
+        elif snf is None:
+            self.S = SNFMatrix.static_hstack(*local_span)
+        else:
+            self.S = SNFMatrix.from_decomposition(DMatrix.static_hstack(*local_span), *snf)
+        self._to_arena(self.S)
+        # Relations in the coordinates of S, undecomposed.
+        if ambient is None:
+            self.R_local = self.R
+        else:
+            self.R_local = None if len(local_relations) == 0 else DMatrix.static_hstack(*local_relations)
         print(f"module initialization: bidegree:{bidegree}, span_set: {span_set}, S: {self.S}, R: {self.R}")
 
         if _verify:
             if self.S is None:
-                for r in self.relation.coords:
+                for r in local_relations:
                     # If the span set is empty, only literal zero vectors are valid relations.
                     assert all(e == self.domain.zero for e in r.to_list_flat())
             elif self.S.shape[0] == 0:
-                for r in self.relation.coords:
+                for r in local_relations:
                     # In a zero ambient module, only zero-dimensional relation vectors are valid.
                     assert r.shape[0] == 0
             else:
-                for r in self.relation.coords:
+                for r in local_relations:
                     assert self.S.spans(r)
 
+    @classmethod
+    def shared_from(cls, page: Page, module: Module) -> Module:
+        """
+        Present the same module on another page without recomputation.
+
+        The span and relation coordinates, the cached SNF decomposition of S and the relative data derived
+        from it are shared by reference.
+        """
+        res = cls.__new__(cls)
+        res.page = page
+        res.bideg = module.bideg
+        res.domain = module.domain
+        res.dim = module.dim
+        res.shared = True
+        res.span = HomoCollection(page=page, bideg=module.bideg, coords=module.span.coords)
+        res.S = module.S
+        res.relation = HomoCollection(page=page, bideg=module.bideg, coords=module.relation.coords)
+        res.R = module.R
+        res.R_local = module.R_local
+        res.ambient_page = module.ambient_page
+        for name in ("rank", "basis", "R_rel", "steps", "ambient_steps", "ambient_basis"):
+            if name in module.__dict__:
+                res.__dict__[name] = module.__dict__[name]
+        return res
+
+    def to_data(self) -> dict:
+        """
+        The span and relation columns with the decompositions of S and R_rel, in the plain form of src/serialization.py.
+
+        Columns relative to the ambient basis are kept under "local", together with the ambient page.
+        """
+        data = {"span": pack_columns(self.span.coords), "relations": pack_columns(self.relation.coords),
+                "snf": None, "R_rel": None, "ambient": self.ambient_page, "local": None}
+        if self.S is not None:
+            data["snf"] = (pack(self.S.D), pack(self.S.U), pack(self.S.V))
+        if "R_rel" in self.__dict__ and self.R_rel is not None:
+            data["R_rel"] = tuple(pack(m) for m in (self.R_rel, self.R_rel.D, self.R_rel.U, self.R_rel.V))
+        if self.ambient_page is not None:
+            relations = [] if self.R_local is None else self.R_local.columns()
+            data["local"] = (pack_columns([] if self.S is None else DMatrix.from_rep(self.S.rep).columns()),
+                             pack_columns(relations))
+        return data
+
+    @classmethod
+    def from_data(cls, page: Page, bidegree: Bidegree, data: dict, ambient: Module | None = None) -> Module:
+        """
+        Rebuild a module from `to_data` without recomputing any decomposition.
+
+        The ambient module may be passed if it is at hand; otherwise it is looked up only once it is needed.
+        """
+        snf = None if data["snf"] is None else tuple(unpack(m, page.domain) for m in data["snf"])
+        local = None
+        if data.get("ambient") is None:
+            ambient = None
+        else:
+            ambient = data["ambient"] if ambient is None else ambient
+            local = tuple(unpack_columns(columns, page.domain) for columns in data["local"])
+        module = cls(page, bidegree, unpack_columns(data["span"], page.domain),
+                     unpack_columns(data["relations"], page.domain), snf=snf, ambient=ambient, local=local)
+        if data["R_rel"] is not None:
+            module.R_rel = SNFMatrix.from_decomposition(*(unpack(m, page.domain) for m in data["R_rel"]))
+            module._to_arena(module.R_rel)
+        return module
+
+    def _to_arena(self, M: SNFMatrix | None):
+        """Keep the decomposition of M in the arena of the spectral sequence, if it uses one and M is large."""
+        ss = self.page.ss
+        if M is not None and ss.arena is not None and M.shape[0] * M.shape[1] >= ss.arena_min_entries:
+            M.to_arena(ss.arena)
+
+    def footprint(self) -> int:
+        """
+        Number of matrix entries this module keeps resident, counting every stored matrix densely.
+
+        Entries kept in an arena are not counted.
+        """
+        matrices = [self.R, *self.span.coords, *self.relation.coords]
+        if self.ambient_page is not None:
+            matrices.append(self.R_local)
+        if self.S is not None:
+            matrices += [self.S, *self.S.stored_decomposition()]
+        if self.__dict__.get("basis") is not None:
+            matrices.append(self.basis)
+        if self.__dict__.get("R_rel") is not None:
+            matrices += [self.R_rel, *self.R_rel.stored_decomposition()]
+        return sum(m.shape[0] * m.shape[1] for m in matrices if m is not None and not isinstance(m, ArenaMatrix))
+
+    @cached_property
+    def rank(self) -> int:
+        """Rank of the column module of S."""
+        if self.S is None:
+            return 0
+        return sum(1 for x in self.S.D_diagonal() if x != self.domain.zero)
+
+    def _ambient(self) -> Module:
+        return self.page.ss.pages[self.ambient_page][self.bideg]
+
+    @cached_property
+    def ambient_steps(self) -> tuple[tuple[SNFMatrix, int], ...]:
+        """The decompositions, one per page, that take absolute coordinates to those of S (see `to_ambient`)."""
+        return () if self.ambient_page is None else self._ambient().steps
+
+    @cached_property
+    def steps(self) -> tuple[tuple[SNFMatrix, int], ...]:
+        """`ambient_steps` followed by the decomposition of S, which leads on to coordinates relative to `basis`."""
+        if self.S is None:
+            return self.ambient_steps
+        return self.ambient_steps + ((self.S, self.rank),)
+
+    @cached_property
+    def ambient_basis(self) -> DMatrix | None:
+        """The basis of the ambient module in absolute coordinates, or None if S is absolute."""
+        return None if self.ambient_page is None else self._ambient().basis
+
+    @cached_property
+    def basis(self) -> DMatrix | None:
+        """
+        A basis of the span in absolute coordinates.
+
+        With S * V = U^{-1} * D, the first `rank` columns of S * V are a basis of the column module of S. S is
+        written relative to the ambient basis, so only this product is taken back to absolute coordinates.
+        """
+        if self.S is None:
+            return None
+        return self.from_ambient((DMatrix.from_rep(self.S.rep) * self.S.V).extract_columns(list(range(self.rank))))
+
+    def to_ambient(self, M: DMatrix) -> DMatrix | None:
+        """
+        Express the absolute columns of M in the coordinates of S, or return None if one is outside the ambient span.
+
+        Each step is a product with U and an exact division, one per page, so no decomposition of the absolute
+        dimension is needed.
+        """
+        for S, rank in self.ambient_steps:
+            M = relative_coordinates(S, rank, M)
+            if M is None:
+                return None
+        return M
+
+    def from_ambient(self, C: DMatrix) -> DMatrix:
+        """Map coordinates of S back to absolute coordinates."""
+        return C if self.ambient_page is None else self.ambient_basis * C
+
+    def to_relative(self, M: DMatrix) -> DMatrix | None:
+        """Express the columns of M in the coordinates of `basis`, or return None if one is outside the span."""
+        if self.S is None:
+            return None
+        M = self.to_ambient(M)
+        return None if M is None else relative_coordinates(self.S, self.rank, M)
+
+    def _column_coordinates(self, M: DMatrix) -> list[list | None]:
+        """`column_coordinates` through every step to `basis`, keeping only the columns still inside the span."""
+        res: list[list | None] = [None] * M.shape[1]
+        todo = list(range(M.shape[1]))
+        for S, rank in self.steps:
+            kept = [(j, c) for j, c in zip(todo, column_coordinates(S, rank, M)) if c is not None]
+            if len(kept) == 0:
+                return res
+            todo = [j for j, _ in kept]
+            if rank == 0:
+                M = DMatrix.zeros((0, len(kept)), self.domain)
+            else:
+                M = DMatrix.from_list([list(row) for row in zip(*(c for _, c in kept))], self.domain)
+        for j, c in zip(todo, M.transpose().to_list()):
+            res[j] = c
+        return res
+
+    def to_absolute(self, C: DMatrix) -> DMatrix:
+        """Map coordinates relative to `basis` back to absolute coordinates."""
+        return self.basis * C
+
+    @cached_property
+    def R_rel(self) -> SNFMatrix | None:
+        """
+        Relations in coordinates relative to `basis`, with a cached SNF decomposition.
+
+        Like S, this matrix has as many rows as a rank of an earlier module (here, `rank`) instead of the absolute
+        dimension, so the decompositions stay small on later pages where the span is a thin subspace of E1.
+        """
+        if self.R_local is None or self.rank == 0:
+            return None
+        R_rel = relative_coordinates(self.S, self.rank, self.R_local)
+        assert R_rel is not None, f"Relations are not contained in the span at bidegree {self.bideg}."
+        R_rel = SNFMatrix.from_list(R_rel.to_list(), self.domain)
+        self._to_arena(R_rel)
+        return R_rel
+
     def get_structural_information(self):
         """
         Return nontrivial generators and their torsion data.
 
-        We first replace the raw span matrix by a basis of its column module.
-        Aligning relations directly against an arbitrary spanning set can
-        introduce spurious free summands when the span columns are dependent.
+        Relations are decomposed in coordinates relative to a basis of the span. Working against a basis
+        rather than the raw spanning set avoids spurious free summands when the span columns are dependent.
         """
+        store = self.page.ss.result_store
+        if store is None:
+            return self._structural_information()
+        res = store.load_structure(self)
+        if res is False:
+            res = self._structural_information()
+            store.save_structure(self, res)
+        return res
+
+    def _structural_information(self):
         if self.S is None:
             return None
 
-        diag_s = self.S.D.diagonal()
-        rank = sum(1 for x in diag_s if x != self.domain.zero)
+        rank = self.rank
         if rank == 0:
             return [], []
 
-        span_basis = (self.S * self.S.V).extract_columns(list(range(rank)))
+        if self.R_rel is None:
+            return self.basis.columns(), [self.domain.zero] * rank
 
-        if self.R is None:
-            return span_basis.columns(), [self.domain.zero] * rank
-
-        P, Q, D = SNF.align(self.R, span_basis)
-        gens = (span_basis * Q).columns()
+        D, U = self.R_rel.D, self.R_rel.U
+        gens = self.to_absolute(SNF.invert_unimodular(U)).columns()
         diag = D.diagonal()
         torsion = [diag[i] if i < len(diag) else self.domain.zero for i in range(len(gens))]
 
@@ -85,17 +407,49 @@ class Module:
             1 if vec is in module but not zero space (non-trivial)
             2 if vec is outside module (error condition)
         """
-        for i in v.to_list():
+        for i in v.to_list_flat():
             if i != self.domain.zero:
                 break
         else:
             return 0
-        if self.S is None or not self.S.spans(v):
+        c = self.to_relative(v)
+        if c is None:
             return 2
-        if self.R is None or not self.R.spans(v):
+        if self.R_rel is None or not self.R_rel.spans(c):
             return 1
         return 0
 
+    def classify_many(self, M: DMatrix) -> list[int]:
+        """
+        `classify` for every column of M, testing membership in the span and in the relations once per block.
+        """
+        domain = self.domain
+        columns = M.transpose().to_list()
+        status: list[int | None] = [0 if all(x == domain.zero for x in col) else None for col in columns]
+        todo = [j for j, st in enumerate(status) if st is None]
+        if len(todo) == 0:
+            return status
+        if self.S is None:
+            for j in todo:
+                status[j] = 2
+            return status
+
+        coords = self._column_coordinates(M.extract_columns(todo))
+        in_span = []
+        for j, c in zip(todo, coords):
+            if c is None:
+                status[j] = 2
+            elif self.R_rel is None:
+                status[j] = 1
+            else:
+                in_span.append((j, c))
+        if in_span:
+            C = DMatrix.from_list([list(row) for row in zip(*(c for _, c in in_span))], domain)
+            R_rank = sum(1 for x in self.R_rel.D_diagonal() if x != domain.zero)
+            for (j, _), r in zip(in_span, column_coordinates(self.R_rel, R_rank, C)):
+                status[j] = 1 if r is None else 0
+        return status
+
     def get_diff_span(self, I: HomoCollection = None, d_I: HomoCollection = None):
         """
         Return d(S) for this module's span generators.
@@ -105,39 +459,29 @@ class Module:
         """
         return self.page.d.get_diff_span(self.bideg)
 
-    def get_diff_ker(self):
+    def kernel_coefficients(self) -> DMatrix:
         """
-        Compute ker(d) in absolute coordinates at this bidegree, then include source relations.
+        Coefficients on the columns of S of generators of ker(d) at this bidegree, before source relations.
 
-        If d(S) is represented by columns and target relations are R', we solve
-            d(S) * u - R' * v = 0
-        by taking the kernel of [d(S) | -R'] and projecting to the u-part.
+        See `diff_kernel_coefficients` for the linear system that is solved; d(S) is taken relative to the basis
+        of the target module whenever it lies in its span.
+        """
+        target_module = self.page[self.bideg + self.page.d.d_bidegree]
+        dS_M = self.page.d.get_diff_span(self.bideg).to_matrix()
+        if dS_M is None:
+            # This can only occur for the trivial source span.
+            return DMatrix.from_list([[] for _ in range(self.S.shape[1])], self.domain)
+        return diff_kernel_coefficients(dS_M, target_module.to_relative(dS_M), target_module.R, target_module.R_rel)
+
+    def get_diff_ker(self):
+        """
+        Compute ker(d) at this bidegree in absolute coordinates, then include source relations.
         """
         # If the source span is empty, the kernel is exactly the relation part.
         if self.span.is_empty:
             return self.relation
 
-        target_bideg = self.bideg + self.page.d.d_bidegree
-        target_module = self.page[target_bideg]
-        dS = self.page.d.get_diff_span(self.bideg)
-        dS_M = dS.to_matrix()
-
-        # Number of source span generators (columns of S).
-        n = self.S.shape[1]
-
-        if dS_M is None:
-            # This can only occur for the trivial source span; guarded above, but keep safe.
-            ker_coeff = DMatrix.from_list([[] for _ in range(n)], self.domain)
-        else:
-            if target_module.R is None:
-                block = dS_M
-            else:
-                block = DMatrix.static_hstack(dS_M, -target_module.R)
-
-            ker_block = SNF.kernel_of(block)
-            ker_coeff = ker_block.extract(list(range(n)), list(range(ker_block.shape[1])))
-
-        ker_from_span = self.S * ker_coeff
+        ker_from_span = self.span.to_matrix() * self.kernel_coefficients()
         ker_collection = HomoCollection.from_matrix(self.page, self.bideg, ker_from_span)
         return ker_collection.join(self.relation)
 
@@ -150,14 +494,35 @@ class Page:
 
     ss: "SpectralSequence"
     page_num: int
+    divider_cache_size = 128
+    division_cache_size = 4096
 
     def __init__(self, ss: "SpectralSequence", page_num: int, io_pairs: dict, d_bigrade: "Bidegree"):
         self.ss: SpectralSequence = ss
         self.domain = self.ss.domain
         self.page_num = page_num
         self.modules: dict = {}
+        # The differentials supplied for this page, and whether further values were entered interactively.
+        # Together they identify the page's results in a result store.
+        self.supplied_diff = sorted([str(k), str(v)] for k, v in io_pairs.items())
+        self.interactive = False
+        if ss.checkpoint is not None:
+            ss.checkpoint.record_page(self)
+        # Recently used dividers, keyed by the divisor and the quotient bidegree (see divider).
+        self._dividers: OrderedDict[tuple, Divider] = OrderedDict()
+        # Recent results of divide, keyed by the coordinates of divisor and dividend, with hit counts.
+        self._divisions: OrderedDict[tuple, tuple] = OrderedDict()
+        self.division_hits = 0
+        self.division_misses = 0
         self.d = Differential(self, io_pairs, Bidegree(d_bigrade))
 
+    def mark_interactive(self):
+        """Record that differential values were entered interactively on this page."""
+        if not self.interactive:
+            self.interactive = True
+            if self.ss.checkpoint is not None:
+                self.ss.checkpoint.record_interactive(self.page_num)
+
     @staticmethod
     def _normalize_bidegree(bidegree) -> Bidegree:
         if isinstance(bidegree, IMatrix):
@@ -175,14 +540,50 @@ class Page:
 
     def __getitem__(self, bidegree: Bidegree) -> Module:
         bidegree = self._normalize_bidegree(bidegree)
+        store = self.ss.module_store
         if bidegree in self.modules:
-            return self.modules[bidegree]
+            if store is not None:
+                store.touch(self.page_num, bidegree)
+        elif store is not None and store.is_spilled(self.page_num, bidegree):
+            self.store_module(bidegree, store.load(self, bidegree))
         else:
-            output = self.generate_module(bidegree)
-            self.modules[bidegree] = output
-            return output
+            # Prerequisites on earlier pages are computed iteratively rather than by recursing through them.
+            self.ss.scheduler.run([(self, MODULE, (int(bidegree[0]), int(bidegree[1])))])
+        return self.modules[bidegree]
+
+    def store_module(self, bidegree: Bidegree, module: Module, persist: bool = True):
+        """
+        Keep a computed module, letting the module store evict others if a memory budget is set.
+
+        With `persist`, the module is also saved to the result store, if one is in use.
+        """
+        if self.modules.get(bidegree, module) is not module:
+            # Divisions may have read the module that is replaced.
+            self._dividers.clear()
+            self._divisions.clear()
+        self.modules[bidegree] = module
+        if persist and self.ss.result_store is not None:
+            self.ss.result_store.save_module(self, bidegree, module)
+        if self.ss.checkpoint is not None:
+            self.ss.checkpoint.record_module(self.page_num, bidegree, module)
+        if self.ss.module_store is not None:
+            self.ss.module_store.added(self.page_num, bidegree, module)
+
+    def has_module(self, bidegree: Bidegree) -> bool:
+        """Whether the module at a bidegree is computed, either resident or spilled to disk."""
+        store = self.ss.module_store
+        return bidegree in self.modules or (store is not None and store.is_spilled(self.page_num, bidegree))
+
+    def memory_usage(self) -> dict:
+        """Resident modules, their footprint in matrix entries (see `Module.footprint`) and spilled modules."""
+        if self.ss.module_store is not None:
+            return self.ss.module_store.usage(self.page_num)
+        return {"modules": len(self.modules), "entries": sum(m.footprint() for m in self.modules.values()),
+                "spilled": 0}
 
     def generate_module(self, bidegree) -> Module:
+        if not self.ss.in_first_quadrant(bidegree):
+            return Module(self, bidegree, [], [])  # zero on every page, no need to consult earlier pages
         if self.page_num == 1:
             d = self.ss.get_abs_dimension(bidegree)
             identity = DMatrix.eye((d, d), self.domain).columns()
@@ -192,9 +593,16 @@ class Page:
         prev_page = self.ss.pages[self.page_num - 1]
         assert prev_page is not None
 
-        # Ambient module for E_{r+1} is ker(d_r) inside E_r at this bidegree.
         prev_module_at_bideg = prev_page[bidegree]
-        outgoing_kernel = prev_module_at_bideg.get_diff_ker()
+        if prev_page.differentials_vanish_at(bidegree):
+            # E_{r+1} = E_r here, so the previous module and its decompositions are reused.
+            return Module.shared_from(self, prev_module_at_bideg)
+
+        # Ambient module for E_{r+1} is ker(d_r) inside E_r at this bidegree.
+        if prev_module_at_bideg.span.is_empty:
+            ker_coeff = None
+        else:
+            ker_coeff = prev_module_at_bideg.kernel_coefficients()
 
         # Relations for E_{r+1}: image of incoming d_r from bidegree - d_r.
         incoming_source_bideg = bidegree - prev_page.d.d_bidegree
@@ -209,9 +617,147 @@ class Page:
                 f"from page {prev_page.page_num}."
             )
 
-        # Keep previous-page relations as zero in absolute coordinates of the new page.
-        relations = incoming_image.join(prev_module_at_bideg.relation)
-        return Module(self, bidegree, outgoing_kernel.coords, relations.coords)
+        if ker_coeff is None or prev_module_at_bideg.rank == 0:
+            # Nothing to write relative to: keep previous-page relations as zero in absolute coordinates.
+            kernel = [] if ker_coeff is None else (prev_module_at_bideg.span.to_matrix() * ker_coeff).columns()
+            relations = incoming_image.join(prev_module_at_bideg.relation)
+            return Module(self, bidegree, kernel + prev_module_at_bideg.relation.coords, relations.coords)
+
+        # The new span and relations lie in the span of the previous module and are built relative to its basis.
+        incoming = incoming_image.to_matrix()
+        incoming_rel = None if incoming is None else prev_module_at_bideg.to_relative(incoming)
+        assert incoming is None or incoming_rel is not None, (
+            f"Incoming differential image is not in the span at bidegree {bidegree} on page {prev_page.page_num}."
+        )
+        span, relations = next_page_coordinates(prev_module_at_bideg.S, prev_module_at_bideg.rank,
+                                                prev_module_at_bideg.R_rel, ker_coeff, incoming_rel)
+        to_absolute = prev_module_at_bideg.to_absolute
+        return Module(self, bidegree, [to_absolute(c) for c in span], [to_absolute(c) for c in relations],
+                      ambient=prev_module_at_bideg, local=(span, relations))
+
+    def release_modules(self):
+        """
+        Drop every module of this page together with the differential caches built on them.
+
+        Known differential data is kept, and modules are regenerated on demand by __getitem__.
+        """
+        self.modules.clear()
+        self._dividers.clear()
+        self._divisions.clear()
+        if self.ss.module_store is not None:
+            self.ss.module_store.forget_page(self.page_num)
+        self.d.diff_span_cache.clear()
+        self.d.info_collections.clear()
+
+    def compute_region(self, box, workers: int | None = None) -> Page:
+        """
+        Compute the modules of this page on a box (a pair (x_range, y_range)), spreading the work over processes.
+
+        Earlier pages are filled on the bidegrees this page depends on. With `workers` > 1 this runs as a
+        wavefront over all pages at once (see `parallel.run_wavefront`): the module of E_r at b is started as
+        soon as E_{r-1} is known at b and b -+ d_{r-1}, without waiting for the rest of E_{r-1}. Differential
+        data is completed in this process, since it may need inference or prompt for values, while the linear
+        algebra of each module runs in a worker. With `workers` None or 1, everything runs in this process.
+        """
+        from src import parallel
+
+        regions = self.ss.dependency_regions(self.page_num, box)
+        if workers is not None and workers > 1:
+            parallel.run_wavefront(self.ss, regions, workers)
+        for r in range(1, self.page_num + 1):
+            page = self.ss.pages[r]
+            for b in sorted(regions[r], key=lambda b: (b[0] + b[1], b)):
+                _ = page[b]
+        return self
+
+    def start_module(self, bidegree: Bidegree) -> dict | None:
+        """
+        Prepare the module of this page at a bidegree whose prerequisites on the previous page are computed.
+
+        Differential spans of the previous page are completed here. A module that is shared with the previous
+        page, or lives on page 1, is stored directly and None is returned; otherwise the task for
+        `parallel.build_module` is returned.
+        """
+        if self.page_num == 1 or not self.ss.in_first_quadrant(bidegree):
+            _ = self[bidegree]
+            return None
+        prev_page = self.ss.pages[self.page_num - 1]
+        scheduler = self.ss.scheduler
+        scheduler.run(scheduler.prerequisites((self, MODULE, (int(bidegree[0]), int(bidegree[1])))))
+        if prev_page.differentials_vanish_at(bidegree):
+            self.store_module(bidegree, Module.shared_from(self, prev_page[bidegree]))
+            return None
+        return self._module_task(prev_page, bidegree)
+
+    def _module_task(self, prev_page: Page, bidegree: Bidegree) -> dict:
+        """
+        The data of E_{r-1} that `build_module` needs to build the module of E_r at a bidegree.
+
+        Images of d_{r-1} are passed relative to the basis of the module they land in, so the worker only
+        decomposes matrices of module size.
+        """
+        module = prev_page[bidegree]
+        target = prev_page[bidegree + prev_page.d.d_bidegree]
+        source_bideg = bidegree - prev_page.d.d_bidegree
+        if self.ss.get_abs_dimension(source_bideg) == 0:
+            incoming = None
+        else:
+            incoming = prev_page.d.get_diff_span(source_bideg).to_matrix()
+        dS = prev_page.d.get_diff_span(bidegree).to_matrix()
+        return {
+            "domain": domain_spec(self.domain),
+            # Parts of a decomposition kept in an arena are passed as handles and mapped by the worker.
+            "S": tuple(pack(m) for m in (module.S, *module.S.stored_decomposition())),
+            "rank": module.rank,
+            "basis": pack(module.basis),
+            "span": pack(module.span.to_matrix()),
+            "relations": pack_columns(module.relation.coords),
+            "R_rel": pack(module.R_rel),
+            "dS": pack(dS),
+            "dS_rel": None if dS is None else pack(target.to_relative(dS)),
+            "target_R": pack(target.R),
+            "target_R_rel": pack(target.R_rel),
+            "incoming": pack(incoming),
+            "incoming_rel": None if incoming is None else pack(module.to_relative(incoming)),
+            "ambient": prev_page.page_num,
+        }
+
+    def finish_module(self, bidegree: Bidegree, result: dict):
+        """Store the module built by `parallel.build_module` from the task of `start_module`."""
+        ambient = None if result["ambient"] is None else self.ss.pages[result["ambient"]][bidegree]
+        self.store_module(bidegree, Module.from_data(self, bidegree, result, ambient=ambient))
+
+    def differentials_vanish_at(self, bidegree: Bidegree) -> bool:
+        """
+        Whether both d_r out of this bidegree and d_r into it are zero in the respective modules.
+        """
+        module = self[bidegree]
+        if module.span.is_empty:
+            return True
+
+        target_module = self[bidegree + self.d.d_bidegree]
+        if any(target_module.classify(c) != 0 for c in self.d.get_diff_span(bidegree).coords):
+            return False
+
+        source_bideg = bidegree - self.d.d_bidegree
+        if self.ss.get_abs_dimension(source_bideg) == 0:
+            return True
+        return all(module.classify(c) == 0 for c in self.d.get_diff_span(source_bideg).coords)
+
+    def divider(self, x: HomoElem, q_bideg: Bidegree) -> Divider:
+        """
+        The `Divider` by x into quotient bidegree q_bideg, reused while it stays among the most recent ones.
+        """
+        key = (x, int(q_bideg[0]), int(q_bideg[1]))
+        divider = self._dividers.get(key)
+        if divider is not None:
+            self._dividers.move_to_end(key)
+            return divider
+        divider = Divider(self, x, q_bideg)
+        self._dividers[key] = divider
+        if len(self._dividers) > self.divider_cache_size:
+            self._dividers.popitem(last=False)
+        return divider
 
     def divide(self, x: HomoElem, y: HomoElem):
         """
@@ -227,45 +773,36 @@ class Page:
             - K_or_none generates the quotient ambiguity span(K_raw)/span(R_q),
               where K_raw is the full solution-difference kernel in absolute
               coordinates and R_q are relations in the quotient module.
-        """
-        q_bideg = y.bidegree - x.bidegree
-        M_q, M_y = self[q_bideg], self[y.bidegree]
-        xS_q = x * M_q.span
-        xS_q_with_rel = xS_q.join(M_y.relation)
 
-        if xS_q_with_rel.is_empty:
-            if y.isZero():
-                q_abs_dim = self.ss.get_abs_dimension(q_bideg)
-                q_zero_coord = DMatrix.zeros((q_abs_dim, 1), self.domain)
-                q = HomoElem(self, abs_bideg=q_bideg, abs_coordinate=q_zero_coord)
-                K = DMatrix.zeros((q_abs_dim, 0), self.domain)
-                return q, K
-            else:
-                return None, None
-
-        solve_res = SNF.solve(y.coordinate, xS_q_with_rel.to_matrix())
-        if solve_res is None:
-            return None, None
-        combined_coord, ker = solve_res
+        Repeated divisions by x into the same bidegree share one factorization (see `divider`), and the
+        results of recent divisions are kept, so a repeated (x, y) pair is answered without solving. Both
+        caches are dropped whenever a module of this page is replaced or released.
+        """
+        key = (self._fingerprint(x), self._fingerprint(y))
+        res = self._divisions.get(key)
+        if res is not None:
+            self._divisions.move_to_end(key)
+            self.division_hits += 1
+            return res
+        self.division_misses += 1
+        res = self.divider(x, y.bidegree - x.bidegree).divide(y)
+        self._divisions[key] = res
+        if len(self._divisions) > self.division_cache_size:
+            self._divisions.popitem(last=False)
+        return res
 
-        source_col_num = len(xS_q)
-        if source_col_num == 0:
-            q_abs_dim = self.ss.get_abs_dimension(q_bideg)
-            q_zero_coord = DMatrix.zeros((q_abs_dim, 1), self.domain)
-            q = HomoElem(self, abs_bideg=q_bideg, abs_coordinate=q_zero_coord)
-        else:
-            coord_in_S = combined_coord.to_list()[:source_col_num]
-            abs_coord = M_q.S * DMatrix.from_list(coord_in_S, self.domain)
-            q = HomoElem(self, abs_bideg=q_bideg, abs_coordinate=abs_coord)
+    @staticmethod
+    def _fingerprint(e: HomoElem) -> tuple | None:
+        if e.bidegree is None:
+            return None
+        return int(e.bidegree[0]), int(e.bidegree[1]), tuple(e.coordinate.to_list_flat())
 
-        if source_col_num == 0:
-            q_abs_dim = self.ss.get_abs_dimension(q_bideg)
-            K_raw = DMatrix.zeros((q_abs_dim, 0), self.domain)
-        else:
-            ker_coeff = ker.extract(list(range(source_col_num)), list(range(ker.shape[1])))
-            K_raw = M_q.S * ker_coeff
-        K_mod_rel = self._kernel_mod_relations(K_raw, M_q)
-        return q, K_mod_rel
+    def cache_stats(self) -> dict:
+        """Hits and misses of the division memo, and invalidations and recomputations of differential spans."""
+        lookups = self.division_hits + self.division_misses
+        return {"division_hits": self.division_hits, "division_misses": self.division_misses,
+                "division_hit_rate": self.division_hits / lookups if lookups else 0.0,
+                "diff_span_invalidations": self.d.invalidations, "diff_span_recomputations": self.d.recomputations}
 
     def _kernel_unique_mod_relations(self, K_raw: DMatrix, M_q: Module) -> bool:
         """Return whether every division ambiguity is zero in the quotient module.
@@ -277,9 +814,10 @@ class Page:
             return True
         if all(x == self.domain.zero for x in K_raw.to_list_flat()):
             return True
-        if M_q.R is None or M_q.R.shape[1] == 0:
+        if M_q.R_rel is None:
             return False
-        return SNF.solve(K_raw, M_q.R) is not None
+        K_rel = M_q.to_relative(K_raw)
+        return K_rel is not None and M_q.R_rel.solve(K_rel) is not None
 
     def _kernel_mod_relations(self, K_raw: DMatrix, M_q: Module) -> DMatrix:
         """
@@ -294,6 +832,7 @@ class Page:
 
         The raw kernel may have dependent columns, so we first replace it by a
         basis of its column module before aligning the quotient relations.
+        Both steps run in coordinates relative to the basis of M_q.
         """
         if K_raw.shape[1] == 0:
             return K_raw
@@ -306,25 +845,29 @@ class Page:
         # Extract a genuine basis of Col(K_raw). Quotient-structure extraction
         # is only valid after this basis step; using a dependent spanning set
         # can introduce spurious ambiguity generators.
-        D_raw, _, V_raw = SNF.decomp(K_raw)
+        K_rel = M_q.to_relative(K_raw)
+        assert K_rel is not None, (
+            f"Expected the divide kernel to lie in the span at bidegree {M_q.bideg} on page {self.page_num}."
+        )
+        D_raw, _, V_raw = SNF.decomp(K_rel)
         rank = sum(1 for x in D_raw.diagonal() if x != self.domain.zero)
         if rank == 0:
             return DMatrix.zeros((K_raw.shape[0], 0), self.domain)
-        K_basis = (K_raw * V_raw).extract_columns(list(range(rank)))
+        K_basis = (K_rel * V_raw).extract_columns(list(range(rank)))
 
-        if M_q.R is None or M_q.R.shape[1] == 0:
-            return K_basis
+        if M_q.R_rel is None:
+            return M_q.to_absolute(K_basis)
 
         # Expected in well-defined module actions: quotient relations are
         # among solution-difference directions.
-        solved = SNF.solve(M_q.R, K_basis)  # M_q.R = K_basis * X
+        solved = SNF.solve(M_q.R_rel, K_basis)  # R_rel = K_basis * X
         assert solved is not None, (
             "Expected quotient-module relations to lie in the divide-kernel ambiguity, "
             f"but failed for bidegree {M_q.bideg} on page {self.page_num}."
         )
         X = solved[0]
-        _, Q, D = SNF.align(M_q.R, K_basis, _X=X)
-        K_aligned = K_basis * Q
+        _, Q, D = SNF.align(M_q.R_rel, K_basis, _X=X)
+        K_aligned = M_q.to_absolute(K_basis * Q)
 
         diag_len = min(D.shape)
         keep_indices = []
@@ -342,3 +885,78 @@ class Page:
         """Divide the i-th element in X by the i-th element in l and form a new HomoCollection."""
         elems = [self.divide(l[i], x)[0] for (i, x) in enumerate(X.elems)]
         return HomoCollection(page=self, bideg=X.bideg, elems=elems)
+
+
+class Divider:
+    """
+    Division by a fixed element x into a fixed quotient bidegree, for any number of dividends.
+
+    Solving x * q = y in the module at the bidegree of y means solving [x * S_q | R_y] * c = y for c, where S_q
+    spans the module of q and R_y holds the relations at y. The system is written relative to the basis of the
+    module of y whenever x * S_q lies in its span, and its SNF decomposition is computed once, as is the
+    ambiguity of q, which does not depend on y. The ambiguity reduction runs relative to the basis of the module
+    of q.
+    """
+
+    def __init__(self, page: Page, x: HomoElem, q_bideg: Bidegree):
+        self.page = page
+        self.x = x
+        self.q_bideg = q_bideg
+        self.M_q = page[q_bideg]
+        self.S_q = self.M_q.span.to_matrix()
+        xS_q = x * self.M_q.span
+        self.source_col_num = len(xS_q)
+        M_y = page[q_bideg + x.bidegree]
+        xS_q_rel = None if xS_q.is_empty else M_y.to_relative(xS_q.to_matrix())
+        if xS_q_rel is not None:
+            self._coordinates = M_y.to_relative
+            self.A = xS_q_rel if M_y.R_rel is None else DMatrix.static_hstack(xS_q_rel, M_y.R_rel)
+        else:
+            self._coordinates = None
+            xS_q_with_rel = xS_q.join(M_y.relation)
+            self.A = None if xS_q_with_rel.is_empty else xS_q_with_rel.to_matrix()
+        if self.A is not None:
+            self.D, self.U, self.V = SNF.decomp(self.A)
+        self._K: DMatrix | None = None
+
+    def _zero_quotient(self) -> HomoElem:
+        q_abs_dim = self.page.ss.get_abs_dimension(self.q_bideg)
+        q_zero_coord = DMatrix.zeros((q_abs_dim, 1), self.page.domain)
+        return HomoElem(self.page, abs_bideg=self.q_bideg, abs_coordinate=q_zero_coord)
+
+    def _kernel(self, ker: DMatrix) -> DMatrix:
+        """The quotient ambiguity, from the kernel of [x * S_q | R_y] (the same for every dividend)."""
+        if self._K is None:
+            if self.source_col_num == 0:
+                q_abs_dim = self.page.ss.get_abs_dimension(self.q_bideg)
+                K_raw = DMatrix.zeros((q_abs_dim, 0), self.page.domain)
+            else:
+                ker_coeff = ker.extract(list(range(self.source_col_num)), list(range(ker.shape[1])))
+                K_raw = self.S_q * ker_coeff
+            self._K = self.page._kernel_mod_relations(K_raw, self.M_q)
+        return self._K
+
+    def divide(self, y: HomoElem):
+        """Return (q, K) as `Page.divide` does for x and y."""
+        if self.A is None:
+            if y.isZero():
+                q_abs_dim = self.page.ss.get_abs_dimension(self.q_bideg)
+                return self._zero_quotient(), DMatrix.zeros((q_abs_dim, 0), self.page.domain)
+            return None, None
+
+        T = y.coordinate if self._coordinates is None else self._coordinates(y.coordinate)
+        if T is None:
+            # Outside the module of y, and so outside the column module of A.
+            return None, None
+        solve_res = SNF.solve(T, self.A, self.U, self.D, self.V)
+        if solve_res is None:
+            return None, None
+        combined_coord, ker = solve_res
+
+        if self.source_col_num == 0:
+            q = self._zero_quotient()
+        else:
+            coord_in_S = combined_coord.to_list()[:self.source_col_num]
+            abs_coord = self.S_q * DMatrix.from_list(coord_in_S, self.page.domain)
+            q = HomoElem(self.page, abs_bideg=self.q_bideg, abs_coordinate=abs_coord)
+        return q, self._kernel(ker)
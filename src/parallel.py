@@ -0,0 +1,159 @@
+"""
+Building page modules in worker processes.
+
+`Page.start_module` completes everything that needs the whole spectral sequence (earlier modules and the
+differential spans, which may need inference or user input) in the main process. What is left for one bidegree
+is independent linear algebra: the kernel of d_{r-1}, the new span and relations, and their decompositions.
+A task carries exactly the matrices that step reads, in the plain form of src/serialization.py, and its result
+is the data of the new module in the form of `Module.to_data`.
+"""
+from __future__ import annotations
+
+import warnings
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from heapq import heappop, heappush
+from pickle import PicklingError
+from typing import TYPE_CHECKING
+
+from src.element import Bidegree
+from src.matrices import DMatrix
+from src.serialization import domain_from_spec, pack, pack_columns, unpack, unpack_columns
+from src.snf import SNF, SNFMatrix
+from src.page_and_module import relative_coordinates, diff_kernel_coefficients, next_page_coordinates
+
+if TYPE_CHECKING:
+    from src.spectral_sequence import SpectralSequence
+
+Item = tuple[int, tuple[int, int]]  # (page number, bidegree)
+
+
+def rank_of(D: DMatrix) -> int:
+    return sum(1 for x in D.diagonal() if x != D.domain.zero)
+
+
+def build_module(task: dict) -> dict:
+    """
+    Compute the span, relations and decompositions of one module of E_r from the data of E_{r-1}.
+
+    This mirrors `Page.generate_module` when the module is not shared with E_{r-1}: the span is ker(d_{r-1})
+    joined with the old relations, and the relations are the incoming image joined with the old relations. Both
+    are built and decomposed relative to the basis of the E_{r-1} module, and taken to absolute coordinates
+    only for the result.
+    """
+    domain = domain_from_spec(task["domain"])
+    result = {"snf": None, "R_rel": None, "ambient": None, "local": None}
+    # Modules with an empty span on E_{r-1} are shared, so S is never None here.
+    S = SNFMatrix.from_decomposition(*(unpack(m, domain) for m in task["S"]))
+    dS = unpack(task["dS"], domain)
+    if dS is None:
+        ker_coeff = DMatrix.from_list([[] for _ in range(S.shape[1])], domain)
+    else:
+        ker_coeff = diff_kernel_coefficients(dS, unpack(task["dS_rel"], domain), unpack(task["target_R"], domain),
+                                             unpack(task["target_R_rel"], domain))
+
+    if task["rank"] == 0:
+        # Nothing to write relative to, as in `Page.generate_module`.
+        incoming = unpack(task["incoming"], domain)
+        relations = unpack_columns(task["relations"], domain)
+        span = (unpack(task["span"], domain) * ker_coeff).columns() + relations
+        new_relations = ([] if incoming is None else incoming.columns()) + relations
+        result.update(span=pack_columns(span), relations=pack_columns(new_relations))
+        if len(span) > 0:
+            result["snf"] = tuple(pack(m) for m in SNF.decomp(DMatrix.static_hstack(*span)))
+        return result
+
+    span, new_relations = next_page_coordinates(S, task["rank"], unpack(task["R_rel"], domain), ker_coeff,
+                                                unpack(task["incoming_rel"], domain))
+    basis = unpack(task["basis"], domain)
+    result.update(span=pack_columns([basis * c for c in span]),
+                  relations=pack_columns([basis * c for c in new_relations]),
+                  ambient=task["ambient"], local=(pack_columns(span), pack_columns(new_relations)))
+    if len(span) == 0:
+        return result
+
+    D, U, V = SNF.decomp(DMatrix.static_hstack(*span))
+    result["snf"] = (pack(D), pack(U), pack(V))
+    rank = rank_of(D)
+    if len(new_relations) > 0 and rank > 0:
+        new_S = SNFMatrix.from_decomposition(DMatrix.static_hstack(*span), D, U, V)
+        R_rel = relative_coordinates(new_S, rank, DMatrix.static_hstack(*new_relations))
+        result["R_rel"] = (pack(R_rel), *(pack(m) for m in SNF.decomp(R_rel)))
+    return result
+
+
+def run_wavefront(ss: SpectralSequence, regions: list[set[tuple[int, int]]], workers: int):
+    """
+    Compute the modules of every page r on regions[r] as a wavefront over a pool of `workers` processes.
+
+    The module of E_r at b only reads E_{r-1} at b and b -+ d_{r-1}, so it becomes ready as soon as those
+    modules exist; the ready ones are started in ascending total degree, then page. There is no barrier between
+    pages, and deep pages are limited by the longest dependency chain rather than by page-by-page barriers.
+    If the pool cannot be used, the call warns and returns early, and the caller computes the rest serially.
+    Errors of the main process, such as spilling or checkpointing a finished module, are raised as they are.
+    """
+    waiting: dict[Item, int] = {}
+    dependents: dict[Item, list[Item]] = {}
+    ready: list[tuple[int, int, Item]] = []
+    for r in range(1, len(regions)):
+        page = ss.pages[r]
+        for b in regions[r]:
+            if page.has_module(Bidegree(b)):
+                continue
+            item = (r, b)
+            deps = []
+            if r > 1:
+                prev_page = ss.pages[r - 1]
+                dx, dy = (int(c) for c in ss.get_diff_bigrade(r - 1))
+                for sign in (-1, 0, 1):
+                    dep = (b[0] + sign * dx, b[1] + sign * dy)
+                    if dep[0] >= 0 and dep[1] >= 0 and not prev_page.has_module(Bidegree(dep)):
+                        deps.append((r - 1, dep))
+            waiting[item] = len(deps)
+            for dep in deps:
+                dependents.setdefault(dep, []).append(item)
+            if len(deps) == 0:
+                heappush(ready, (b[0] + b[1], r, item))
+
+    def finished(item: Item):
+        for dependent in dependents.pop(item, []):
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heappush(ready, (dependent[1][0] + dependent[1][1], dependent[0], dependent))
+
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    except OSError as error:
+        _fall_back(error)
+        return
+    with pool:
+        running: dict[Future, Item] = {}
+        while ready or running:
+            while ready:
+                _, r, item = heappop(ready)
+                task = ss.pages[r].start_module(Bidegree(item[1]))
+                if task is None:
+                    finished(item)
+                    continue
+                try:
+                    running[pool.submit(build_module, task)] = item
+                except (BrokenProcessPool, OSError) as error:
+                    _fall_back(error)
+                    return
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                r, b = item = running.pop(future)
+                try:
+                    result = future.result()
+                except (BrokenProcessPool, PicklingError, OSError) as error:
+                    _fall_back(error)
+                    return
+                ss.pages[r].finish_module(Bidegree(b), result)
+                finished(item)
+
+
+def _fall_back(error: BaseException):
+    warnings.warn(f"Worker processes failed ({error!r}); computing the remaining modules serially.",
+                  RuntimeWarning, stacklevel=3)
@@ -0,0 +1,164 @@
+"""
+A persistent SQLite store of computed results, shared by runs of the same spectral sequence.
+
+Results are keyed by a hash of what determines them: `checkpoint.describe` of the spectral sequence (domain,
+generators, bidegrees, caps and relations) and the differentials supplied to `add_page` on the pages up to the
+one they live on, together with the page number and bidegree. The store holds modules (with their
+decompositions and, once computed, the output of `get_structural_information`), differential spans, and
+absolute bases, encoded as in src/checkpoint.py.
+
+Values entered interactively are not part of the key, so nothing is read from or written to the store for a
+page once such a value was entered on it or on an earlier page. A stored differential span is used without
+rerunning the inference that produced it, so `Differential.info` only grows where spans are computed.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import hashlib
+import json
+import sqlite3
+
+from src.checkpoint import decode_module_data, decode_packed, decode_scalar, describe, encode_module_data, \
+    encode_packed, encode_scalar
+from src.element import Bidegree, HomoCollection
+from src.serialization import pack, unpack
+
+if TYPE_CHECKING:
+    from src.page_and_module import Module, Page
+    from src.spectral_sequence import SpectralSequence
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    key TEXT NOT NULL, x INTEGER NOT NULL, y INTEGER NOT NULL, data TEXT NOT NULL, structure TEXT,
+    PRIMARY KEY (key, x, y)
+);
+CREATE TABLE IF NOT EXISTS diff_spans (
+    key TEXT NOT NULL, x INTEGER NOT NULL, y INTEGER NOT NULL, data TEXT NOT NULL,
+    PRIMARY KEY (key, x, y)
+);
+CREATE TABLE IF NOT EXISTS bases (
+    key TEXT NOT NULL, x INTEGER NOT NULL, y INTEGER NOT NULL, monomials TEXT NOT NULL,
+    PRIMARY KEY (key, x, y)
+);
+"""
+
+
+def _digest(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class ResultStore:
+    def __init__(self, ss: SpectralSequence, path: str):
+        self.ss = ss
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        self._spec_key: str | None = None
+        self._page_keys: dict[int, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def spec_key(self) -> str:
+        if self._spec_key is None:
+            self._spec_key = _digest(describe(self.ss))
+        return self._spec_key
+
+    def invalidate_keys(self):
+        """Forget the cached keys, after the relations or generators of the spectral sequence changed."""
+        self._spec_key = None
+        self._page_keys.clear()
+
+    def page_key(self, page: Page) -> str | None:
+        """The key of results on a page, or None if an earlier page or this one had interactive input."""
+        if page.interactive or any(self.ss.pages[r].interactive for r in range(1, page.page_num)):
+            return None
+        if page.page_num not in self._page_keys:
+            supplied = [self.ss.pages[r].supplied_diff for r in range(1, page.page_num)] + [page.supplied_diff]
+            self._page_keys[page.page_num] = _digest({"spec": self.spec_key, "differentials": supplied})
+        return self._page_keys[page.page_num]
+
+    def _get(self, table: str, column: str, key: str | None, bidegree: Bidegree):
+        if key is None:
+            return None
+        row = self.db.execute(f"SELECT {column} FROM {table} WHERE key = ? AND x = ? AND y = ?",
+                              (key, int(bidegree[0]), int(bidegree[1]))).fetchone()
+        if row is None or row[0] is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def _put(self, table: str, column: str, key: str | None, bidegree: Bidegree, value):
+        if key is None:
+            return
+        with self.db:
+            self.db.execute(f"INSERT OR REPLACE INTO {table} (key, x, y, {column}) VALUES (?, ?, ?, ?)",
+                            (key, int(bidegree[0]), int(bidegree[1]), json.dumps(value, separators=(",", ":"))))
+
+    def load_module(self, page: Page, bidegree: Bidegree) -> Module | None:
+        from src.page_and_module import Module
+
+        data = self._get("modules", "data", self.page_key(page), bidegree)
+        if data is None:
+            return None
+        return Module.from_data(page, bidegree, decode_module_data(data))
+
+    def save_module(self, page: Page, bidegree: Bidegree, module: Module):
+        key = self.page_key(page)
+        if key is None:
+            return
+        data = json.dumps(encode_module_data(module.to_data()), separators=(",", ":"))
+        with self.db:
+            # Keep a structure that is already known for this module.
+            self.db.execute("INSERT INTO modules (key, x, y, data) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT (key, x, y) DO UPDATE SET data = excluded.data",
+                            (key, int(bidegree[0]), int(bidegree[1]), data))
+
+    def load_structure(self, module: Module):
+        """The stored output of `get_structural_information` for a module, or False if it is not stored."""
+        data = self._get("modules", "structure", self.page_key(module.page), module.bideg)
+        if data is None:
+            return False
+        if data["gens"] is None:
+            return None
+        domain = module.domain
+        return ([unpack(decode_packed(g), domain) for g in data["gens"]],
+                [domain.from_sympy(decode_scalar(t)) for t in data["torsion"]])
+
+    def save_structure(self, module: Module, structure):
+        key = self.page_key(module.page)
+        if key is None:
+            return
+        if structure is None:
+            value = {"gens": None, "torsion": None}
+        else:
+            gens, torsion = structure
+            value = {"gens": [encode_packed(pack(g)) for g in gens],
+                     "torsion": [encode_scalar(module.domain.to_sympy(t)) for t in torsion]}
+        with self.db:
+            self.db.execute("UPDATE modules SET structure = ? WHERE key = ? AND x = ? AND y = ?",
+                            (json.dumps(value, separators=(",", ":")), key, int(module.bideg[0]),
+                             int(module.bideg[1])))
+
+    def load_diff_span(self, page: Page, bidegree: Bidegree) -> HomoCollection | None:
+        data = self._get("diff_spans", "data", self.page_key(page), bidegree)
+        if data is None:
+            return None
+        target = bidegree + page.d.d_bidegree
+        coords = [unpack(decode_packed(c), page.domain) for c in data]
+        return HomoCollection(page=page, bideg=target, coords=coords)
+
+    def save_diff_span(self, page: Page, bidegree: Bidegree, span: HomoCollection):
+        self._put("diff_spans", "data", self.page_key(page), bidegree,
+                  [encode_packed(pack(c)) for c in span.coords])
+
+    def load_basis(self, bidegree: Bidegree) -> tuple[tuple, ...] | None:
+        data = self._get("bases", "monomials", self.spec_key, bidegree)
+        return None if data is None else tuple(tuple(e) for e in data)
+
+    def save_basis(self, bidegree: Bidegree, basis: tuple[tuple, ...]):
+        self._put("bases", "monomials", self.spec_key, bidegree, [list(e) for e in basis])
+
+    def close(self):
+        self.db.close()
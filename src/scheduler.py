@@ -0,0 +1,120 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from src.element import Bidegree
+
+if TYPE_CHECKING:
+    from src.page_and_module import Page
+    from src.spectral_sequence import SpectralSequence
+
+# Kinds of artifacts. A module comes before the differential span at the same page in the evaluation order.
+MODULE = 0
+DIFF_SPAN = 1
+
+Artifact = tuple["Page", int, tuple[int, int]]  # (page, kind, bidegree)
+
+
+class Scheduler:
+    """
+    Iterative evaluation of page modules and differential spans.
+
+    Each artifact (page, kind, bidegree) is stored in the cache it has always lived in: modules in
+    `Page.modules` and differential spans in `Differential.diff_span_cache`. Instead of letting
+    `Page.__getitem__` recurse through earlier pages, a request walks the dependency DAG with an explicit
+    stack, computes prerequisites in ascending total degree and computes every artifact exactly once.
+
+    Prerequisites of a module on page r > 1 at b (with d the bidegree of d_{r-1}):
+        the module of page r-1 at b, and, unless its span is empty, the differential spans of page r-1 at b and
+        b - d (the latter only if that bidegree has monomials) and the module of page r-1 at b + d.
+    Prerequisites of a differential span on page r at b: the modules of page r at b and b + d.
+    The module at b is required first because whether the rest is needed depends on it; nothing that the lazy
+    evaluation would skip is scheduled, so no extra differential values are ever asked for.
+    """
+
+    def __init__(self, ss: SpectralSequence):
+        self.ss = ss
+
+    def _diff_offset(self, page_num: int) -> tuple[int, int]:
+        dx, dy = (int(c) for c in self.ss.get_diff_bigrade(page_num))
+        return dx, dy
+
+    def is_done(self, artifact: Artifact) -> bool:
+        page, kind, (x, y) = artifact
+        if kind == MODULE:
+            return page.has_module(Bidegree([x, y]))
+        return Bidegree([x, y]) in page.d.diff_span_cache
+
+    def prerequisites(self, artifact: Artifact) -> list[Artifact]:
+        """Prerequisites that are known to be needed given what is computed so far."""
+        page, kind, (x, y) = artifact
+        if kind == DIFF_SPAN:
+            dx, dy = self._diff_offset(page.page_num)
+            return [(page, MODULE, (x, y)), (page, MODULE, (x + dx, y + dy))]
+
+        if page.page_num == 1 or x < 0 or y < 0:
+            return []
+        prev_page = self.ss.pages[page.page_num - 1]
+        prev_module = (prev_page, MODULE, (x, y))
+        if not self.is_done(prev_module):
+            return [prev_module]
+        if prev_page[x, y].span.is_empty:
+            return []
+
+        dx, dy = self._diff_offset(prev_page.page_num)
+        res = [(prev_page, DIFF_SPAN, (x, y)), (prev_page, MODULE, (x + dx, y + dy))]
+        if self.ss.get_abs_dimension(Bidegree([x - dx, y - dy])) != 0:
+            res.append((prev_page, DIFF_SPAN, (x - dx, y - dy)))
+        return res
+
+    def compute(self, artifact: Artifact):
+        page, kind, (x, y) = artifact
+        bidegree = Bidegree([x, y])
+        if kind == MODULE:
+            page.store_module(bidegree, page.generate_module(bidegree))
+        else:
+            page.d.complete_info_set(bidegree)
+
+    def load_stored(self, artifact: Artifact) -> bool:
+        """Take the artifact from the result store, if one is in use and holds it."""
+        store = self.ss.result_store
+        if store is None:
+            return False
+        page, kind, (x, y) = artifact
+        bidegree = Bidegree([x, y])
+        if kind == MODULE:
+            module = store.load_module(page, bidegree)
+            if module is None:
+                return False
+            page.store_module(bidegree, module, persist=False)
+        else:
+            span = store.load_diff_span(page, bidegree)
+            if span is None:
+                return False
+            page.d.diff_span_cache[bidegree] = span
+        return True
+
+    @staticmethod
+    def order_key(artifact: Artifact):
+        page, kind, (x, y) = artifact
+        return page.page_num, kind, x + y, x
+
+    def run(self, targets: list[Artifact]):
+        """Compute the targets and everything they depend on, without recursion across pages."""
+        stack = sorted(targets, key=self.order_key, reverse=True)
+        in_progress: set[Artifact] = set()
+        while stack:
+            artifact = stack.pop()
+            if self.is_done(artifact) or self.load_stored(artifact):
+                continue
+            pending = [p for p in self.prerequisites(artifact) if not self.is_done(p)]
+            if pending:
+                # Everything still in progress is waiting on the artifact at hand, so meeting it again is a cycle.
+                if any(p in in_progress for p in pending):
+                    raise RuntimeError(f"Cyclic dependency while scheduling {artifact}.")
+                in_progress.add(artifact)
+                stack.append(artifact)
+                # The lowest total degree ends up on top of the stack and is computed first.
+                stack.extend(sorted(pending, key=self.order_key, reverse=True))
+                continue
+            self.compute(artifact)
+            in_progress.discard(artifact)
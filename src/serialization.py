@@ -0,0 +1,48 @@
+"""
+Plain-data form of matrices and modules, for worker processes and on-disk storage.
+
+Domain elements are not always picklable (elements of GF(p) are instances of a class created at runtime), so
+matrices are stored as nested lists of SymPy scalars, and domains by a description from which they are rebuilt.
+Matrices kept in an arena (see src/arena.py) stay handles to it, which pickle without their entries.
+"""
+from __future__ import annotations
+
+from sympy import GF
+
+from src.arena import ArenaMatrix
+from src.matrices import DMatrix
+
+
+def domain_spec(domain):
+    if domain.is_FiniteField:
+        return "GF", domain.characteristic()
+    return domain
+
+
+def domain_from_spec(spec):
+    if isinstance(spec, tuple) and spec[0] == "GF":
+        return GF(spec[1])
+    return spec
+
+
+def pack(M: DMatrix | ArenaMatrix | None):
+    if M is None or isinstance(M, ArenaMatrix):
+        return M
+    return M.shape, [[M.domain.to_sympy(e) for e in row] for row in M.to_list()]
+
+
+def unpack(data, domain) -> DMatrix | None:
+    if data is None:
+        return None
+    if isinstance(data, ArenaMatrix):
+        return data.to_dmatrix()
+    shape, rows = data
+    return DMatrix([[domain.from_sympy(e) for e in row] for row in rows], shape, domain)
+
+
+def pack_columns(columns: list[DMatrix]) -> list:
+    return [pack(c) for c in columns]
+
+
+def unpack_columns(data: list, domain) -> list[DMatrix]:
+    return [unpack(c, domain) for c in data]
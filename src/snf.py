@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from src.matrices import *
+from src.arena import Arena, ArenaMatrix
 
 __all__ = ["SNF", "SNFMatrix"]
 _verify = True
@@ -111,6 +112,10 @@ class SNF:
             V = DMatrix.eye((n, n), domain)
             return [D, U, V]
 
+        if m == n and M == DMatrix.eye((m, m), domain):
+            # E1 spans on standard monomials are identities: nothing to decompose.
+            return [DMatrix.eye((m, m), domain), DMatrix.eye((m, m), domain), DMatrix.eye((n, n), domain)]
+
         A = [row[:] for row in M.to_list()]
         U = SNF._identity_dense(m, domain)
         V = SNF._identity_dense(n, domain)
@@ -157,6 +162,13 @@ class SNF:
                     b = A[i][k]
                     if b == zero:
                         continue
+                    if domain.rem(b, pivot) == zero:
+                        # Plain elimination; gcdex may return s = 0 here and swap the rows back and forth.
+                        q = domain.exquo(b, pivot)
+                        SNF._combine_rows_dense(A, k, i, one, zero, -q, one)
+                        SNF._combine_rows_dense(U, k, i, one, zero, -q, one)
+                        changed = True
+                        continue
                     s, t, g = domain.gcdex(pivot, b)
                     u = domain.exquo(pivot, g)
                     v = domain.exquo(b, g)
@@ -171,6 +183,12 @@ class SNF:
                     b = A[k][j]
                     if b == zero:
                         continue
+                    if domain.rem(b, pivot) == zero:
+                        q = domain.exquo(b, pivot)
+                        SNF._combine_cols_dense(A, k, j, one, zero, -q, one)
+                        SNF._combine_cols_dense(V, k, j, one, zero, -q, one)
+                        changed = True
+                        continue
                     s, t, g = domain.gcdex(pivot, b)
                     u = domain.exquo(pivot, g)
                     v = domain.exquo(b, g)
@@ -347,9 +365,27 @@ class SNF:
         return SNF.solve(V, M) is not None
 
 
+def _decomposition_part(name: str) -> property:
+    """A part of the cached decomposition, which may be kept in an arena (see `SNFMatrix.to_arena`)."""
+    key = "_" + name
+
+    def get(self):
+        value = self.__dict__[key]
+        return value.to_dmatrix() if isinstance(value, ArenaMatrix) else value
+
+    def set(self, value):
+        self.__dict__[key] = value
+
+    return property(get, set)
+
+
 class SNFMatrix(DMatrix):
     """Matrix that caches SNF decomposition for kernel/span queries."""
 
+    D = _decomposition_part("D")
+    U = _decomposition_part("U")
+    V = _decomposition_part("V")
+
     @classmethod
     def from_rep(cls, rep) -> SNFMatrix:
         """The __new__ in domain matrix invokes from_rep, so we only need to update this."""
@@ -367,6 +403,42 @@ class SNFMatrix(DMatrix):
         instance.V = V
         return instance
 
+    @classmethod
+    def from_decomposition(cls, M: DMatrix, D: DMatrix, U: DMatrix, V: DMatrix) -> SNFMatrix:
+        """Wrap M together with a decomposition D = U * M * V computed elsewhere, without recomputing it."""
+        instance = super().from_rep(M.rep)
+        if _verify:
+            assert U * M * V == D
+        instance.D = D
+        instance.U = U
+        instance.V = V
+        return instance
+
+    def stored_decomposition(self) -> tuple[DMatrix | ArenaMatrix, ...]:
+        """D, U and V as they are kept: as matrices, or as handles to an arena."""
+        return self.__dict__["_D"], self.__dict__["_U"], self.__dict__["_V"]
+
+    def D_diagonal(self) -> list:
+        """The diagonal of D, read from the arena without materializing D if it is kept there."""
+        return self.__dict__["_D"].diagonal()
+
+    def U_mul(self, M: DMatrix) -> DMatrix:
+        """U * M, computed from the rows of the arena without materializing U if it is kept there."""
+        U = self.__dict__["_U"]
+        return U.mul(M) if isinstance(U, ArenaMatrix) else U * M
+
+    def to_arena(self, arena: Arena):
+        """
+        Move D, U and V to an arena where their entries fit. Accessing them afterwards materializes them through
+        the arena's LRU cache; `D_diagonal` and `U_mul` read the rows directly.
+        """
+        for key in ("_D", "_U", "_V"):
+            value = self.__dict__[key]
+            if isinstance(value, DMatrix):
+                stored = arena.store(value)
+                if stored is not None:
+                    self.__dict__[key] = stored
+
     def solve(self, T: DMatrix) -> DMatrix | None:
         """
         Solve T = self * X for X. Return None if not solvable.
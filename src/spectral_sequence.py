@@ -2,14 +2,22 @@ from __future__ import annotations
 
 from src.element import Bidegree
 from src.page_and_module import Page
-from src.utilities import convex_integral_combinations, Poly
+from src.scheduler import Scheduler
+from src.storage import ModuleStore
+from src.checkpoint import Checkpoint, load as load_checkpoint
+from src.result_store import ResultStore
+from src.arena import Arena
+from src.utilities import rectangle_integral_combinations, StandardMonomialCounter, \
+    minimal_monomials, monomial_divides, Poly
 from src.matrices import *
-from sympy import Symbol
-from collections.abc import Iterable
+from sympy import Symbol, groebner
+from sympy.polys.polytools import GroebnerBasis
+from collections.abc import Iterable, Iterator
 
 
 class SpectralSequence:
-    def __init__(self, domain, gen: list[Symbol], generator_bideg: list[list], diff_bideg_coef):
+    def __init__(self, domain, gen: list[Symbol], generator_bideg: list[list], diff_bideg_coef,
+                 exponent_caps: dict[Symbol, int] | None = None):
         self.gen = gen
         generator_bideg = IM(generator_bideg)
 
@@ -21,11 +29,40 @@ class SpectralSequence:
 
         self.pages: list[Page | None] = [None]  # We used None to occupy the 0 index so that page num agrees with index
         self.relations: list[Poly] = []
+        # Height caps: exponent_caps[i] is the largest surviving power of gen[i] (None if unbounded).
+        # Killed powers are pruned from the absolute bases, so they never enter spans or relations.
+        self.exponent_caps: list[int | None] = [None] * len(gen)
+        for g, height in (exponent_caps or {}).items():
+            self.exponent_caps[gen.index(g)] = height
+        # Exponents of the other killed monomials (unit multiples only). Their multiples are deleted from the
+        # absolute bases, so E1 is presented directly on the surviving standard monomials.
+        self.killed_monomials: tuple[tuple, ...] = ()
 
         # A dictionary that maps bidegree to exponents
         self.absolute_bases: dict[Bidegree: tuple[tuple, ...]] = {}
+        # A dictionary that maps bidegree to {exponent: index in the absolute basis}
+        self.absolute_indices: dict[Bidegree: dict[tuple, int]] = {}
+        # A dictionary that maps bidegree to the number of monomials, filled without enumerating them
+        self.absolute_dimensions: dict[Bidegree: int] = {}
+        # A dictionary that maps bidegree to the page-1 relation columns there
+        self.ker_bases: dict[Bidegree: list[DMatrix]] = {}
+        # Over a field, relations are replaced by a Groebner basis of the whole relation ideal (computed on
+        # demand), and E1 is presented on the standard monomials of its leading-term ideal.
+        self._groebner: GroebnerBasis | None = None
+        self._monomial_counter: StandardMonomialCounter | None = None
 
         self.diff_bideg_coef = IM(diff_bideg_coef)
+        # Computes modules and differential spans together with their prerequisites on earlier pages.
+        self.scheduler = Scheduler(self)
+        # With a memory budget, least recently used modules are spilled to disk (see set_memory_budget).
+        self.module_store: ModuleStore | None = None
+        # Records progress to a checkpoint directory (see start_checkpoint and resume).
+        self.checkpoint: Checkpoint | None = None
+        # Persistent results shared across runs of the same spectral sequence (see use_result_store).
+        self.result_store: ResultStore | None = None
+        # Memory-mapped storage for the decompositions of large modules (see use_arena).
+        self.arena: Arena | None = None
+        self.arena_min_entries = 0
 
     @staticmethod
     def in_first_quadrant(bigrade: Bidegree) -> bool:
@@ -36,8 +73,120 @@ class SpectralSequence:
         return len(self.gen)
 
     def kill(self, *relations):
+        """
+        Add relations. A unit multiple of a pure power g**n is recorded as the height cap n - 1 of g instead,
+        and a unit multiple of any other monomial is deleted from the absolute bases together with its multiples.
+        """
         for relation in relations:
-            self.relations.append(Poly(relation, *self.gen, domain=self.domain))
+            relation_poly = Poly(relation, *self.gen, domain=self.domain)
+            cap = self._as_exponent_cap(relation_poly)
+            if cap is not None:
+                self.set_exponent_cap(self.gen[cap[0]], cap[1])
+            elif self._is_unit_monomial(relation_poly):
+                self.kill_monomial(relation_poly.monoms()[0])
+            else:
+                if self.uses_groebner_basis():
+                    self._assert_no_pages()
+                    self._reset_bases()
+                self.ker_bases.clear()
+                self.relations.append(relation_poly)
+                if self.result_store is not None:
+                    self.result_store.invalidate_keys()
+
+    def uses_groebner_basis(self) -> bool:
+        """
+        Whether polynomial relations are handled by Groebner normal forms rather than page-1 relation columns.
+        This needs a field, as the leading coefficients must be invertible.
+        """
+        return self.domain.is_Field
+
+    def _is_unit_monomial(self, relation_poly: Poly) -> bool:
+        terms = relation_poly.terms()
+        return len(terms) == 1 and self.domain.is_unit(terms[0][1])
+
+    def _as_exponent_cap(self, relation_poly: Poly) -> tuple[int, int] | None:
+        """
+        Return (i, n - 1) if the relation is a unit multiple of gen[i] ** n with n > 0, else None.
+        """
+        terms = relation_poly.terms()
+        if len(terms) != 1:
+            return None
+        exponent, coef = terms[0]
+        if not self.domain.is_unit(coef):
+            return None
+        support = [i for i, e in enumerate(exponent) if e != 0]
+        if len(support) != 1:
+            return None
+        return support[0], exponent[support[0]] - 1
+
+    def set_exponent_cap(self, generator: Symbol, height: int):
+        """
+        Kill generator ** (height + 1), e.g. height 1 for an exterior generator.
+        """
+        i = self.gen.index(generator)
+        if self.exponent_caps[i] is not None and self.exponent_caps[i] <= height:
+            return
+        self._assert_no_pages()
+        self.exponent_caps[i] = height
+        self._reset_bases()
+
+    def kill_monomial(self, exponent: Iterable[int]):
+        """
+        Delete the monomial with the given exponent and all its multiples from the absolute bases.
+        """
+        exponent = tuple(exponent)
+        if any(monomial_divides(m, exponent) for m in self.killed_monomials):
+            return
+        self._assert_no_pages()
+        self.killed_monomials = minimal_monomials(self.killed_monomials + (exponent,))
+        self._reset_bases()
+
+    def _assert_no_pages(self):
+        if len(self.pages) > 1:
+            raise ValueError("Relations affecting the monomial bases must be added before the first page.")
+
+    def _reset_bases(self):
+        self.absolute_bases.clear()
+        self.absolute_indices.clear()
+        self.absolute_dimensions.clear()
+        self.ker_bases.clear()
+        if self.result_store is not None:
+            self.result_store.invalidate_keys()
+        self._groebner = None
+        self._monomial_counter = None
+
+    @property
+    def groebner_basis(self) -> GroebnerBasis | None:
+        """
+        Reduced Groebner basis (grevlex) of the ideal generated by the relations, killed monomials and capped
+        powers, or None if relations are not handled this way.
+
+        The relations are bihomogeneous, so every basis element and every normal form is bihomogeneous and
+        the standard monomials of each bidegree form a basis of E1 there.
+        """
+        if self._groebner is None and self.uses_groebner_basis() and len(self.relations) > 0:
+            generators = [r.as_expr() for r in self.relations]
+            generators.extend(self.as_mono(m).as_expr() for m in self.killed_monomials)
+            generators.extend(g ** (c + 1) for g, c in zip(self.gen, self.exponent_caps) if c is not None)
+            self._groebner = groebner(generators, *self.gen, order="grevlex", domain=self.domain, polys=True)
+        return self._groebner
+
+    @property
+    def monomial_counter(self) -> StandardMonomialCounter:
+        if self._monomial_counter is None:
+            ideal = self.killed_monomials
+            if self.groebner_basis is not None:
+                ideal = ideal + tuple(p.monoms(order="grevlex")[0] for p in self.groebner_basis.polys)
+            self._monomial_counter = StandardMonomialCounter(self.generator_bigrades, self.exponent_caps, ideal)
+        return self._monomial_counter
+
+    def normal_form(self, poly: Poly) -> Poly:
+        """
+        Reduce a polynomial modulo the Groebner basis (if any), giving its canonical representative.
+        """
+        if self.groebner_basis is None:
+            return poly
+        return self.groebner_basis.reduce(poly)[1]
 
     def as_mono(self, exps: Iterable[int]):
         """
@@ -48,45 +197,147 @@ class SpectralSequence:
     def get_ker_basis(self, bigrade) -> list[DMatrix]:
         """
         Calculate the first page kernel basis at a given bidegree from stored relations
+
+        The kernel is spanned by the multiples m * r of each relation r by monomials m (powers of r are
+        combinations of these). Only the m for which some term of m * r is a monomial of the basis give nonzero
+        columns, so they are read off the basis by subtracting the exponents of the terms of r. The bidegree of
+        m itself may lie outside the first quadrant when a generator has a negative degree. Each column is
+        assembled directly from the terms of r by adding exponents, all columns of a bidegree form one sparse
+        matrix, duplicates are dropped by hashing their entries, and the result is cached.
         """
         if not self.in_first_quadrant(bigrade):
             return []
+        if self.groebner_basis is not None:
+            return []  # The relations are already quotiented out by the normal forms
+        if bigrade in self.ker_bases:
+            return self.ker_bases[bigrade]
 
-        res = []
+        dim = self.get_abs_dimension(bigrade)
+        basis = tuple(self.iter_abs_basis(bigrade)) if len(self.relations) > 0 else ()
+        columns: list[dict[int, object]] = []
+        seen: set[tuple] = set()
         for relation_poly in self.relations:
-            abs_bigrade, abs_coordinate = self.get_abs_info(relation_poly)
-            skewed_exps = convex_integral_combinations(self.generator_bigrades.row_join(abs_bigrade), bigrade)
-            for s_exp in skewed_exps:
-                if s_exp[-1] == 0:
+            terms = [(exponent, coef) for exponent, coef in relation_poly.terms() if coef != self.domain.zero]
+            if len(terms) == 0:
+                continue
+            multipliers = set()
+            for e in basis:
+                for exponent, _ in terms:
+                    m = tuple(i - j for i, j in zip(e, exponent))
+                    if all(i >= 0 for i in m):
+                        multipliers.add(m)
+            for mono in sorted(multipliers):
+                column: dict[int, object] = {}
+                for exponent, coef in terms:
+                    product = tuple(i + j for i, j in zip(mono, exponent))
+                    index = self.get_abs_index(bigrade, product)
+                    if index is None:
+                        # Only a killed or capped monomial is missing from the basis; it vanishes in E1.
+                        assert not self.monomial_counter.is_standard(product), (
+                            f"Monomial {product} of a multiple of {relation_poly.as_expr()} is standard but has "
+                            f"no index at bidegree {bigrade}."
+                        )
+                        continue
+                    column[index] = column.get(index, self.domain.zero) + coef
+                key = tuple(sorted((i, c) for i, c in column.items() if c != self.domain.zero))
+                if len(key) == 0 or key in seen:
                     continue
+                seen.add(key)
+                columns.append(dict(key))
 
-                temp_bigrade, temp_coordinate = self.get_abs_info(
-                    self.as_mono(s_exp[:-1]) * relation_poly ** s_exp[-1]
-                )
-                print(f"Page 1:\n"
-                      f"\tKilled {self.as_mono(s_exp[:-1]) * relation_poly ** s_exp[-1]} in {bigrade}"
-                      f"\tas it equals to {self.as_mono(s_exp[:-1])} * "
-                      f"{relation_poly} ** {s_exp[-1]} where \t{relation_poly} = 0")
-                if temp_coordinate not in res:
-                    res.append(temp_coordinate)
+        if len(columns) == 0:
+            res = []
+        else:
+            rows: dict[int, dict[int, object]] = {}
+            for j, column in enumerate(columns):
+                for i, c in column.items():
+                    rows.setdefault(i, {})[j] = c
+            batch = DMatrix(rows, (dim, len(columns)), self.domain)
+            res = [col.to_dense() for col in batch.columns()]
+        self.ker_bases[bigrade] = res
         return res
 
+    def _store_abs_basis(self, bigrade: Bidegree, basis: tuple[tuple, ...]):
+        self.absolute_bases[bigrade] = basis
+        self.absolute_indices[bigrade] = {exponent: i for i, exponent in enumerate(basis)}
+        if self.checkpoint is not None:
+            self.checkpoint.record_basis(bigrade, basis)
+
     def get_abs_basis(self, bigrade) -> tuple[tuple, ...]:
+        """
+        Return the exponents of the monomials at a bidegree, sorted lexicographically.
+        """
         if not self.in_first_quadrant(bigrade):
             return tuple()
         if bigrade in self.absolute_bases.keys():
             return self.absolute_bases[bigrade]
-        else:
-            res = convex_integral_combinations(self.generator_bigrades, bigrade)
-            self.absolute_bases[bigrade] = res
-            return res
+        res = self.result_store.load_basis(bigrade) if self.result_store is not None else None
+        if res is None:
+            res = tuple(self.monomial_counter.iterate(bigrade))
+            if self.result_store is not None:
+                self.result_store.save_basis(bigrade, res)
+        self._store_abs_basis(bigrade, res)
+        return res
+
+    def iter_abs_basis(self, bigrade) -> Iterator[tuple]:
+        """
+        Lazily yield the exponents of `get_abs_basis(bigrade)` without storing them.
+        """
+        if not self.in_first_quadrant(bigrade):
+            return iter(())
+        if bigrade in self.absolute_bases:
+            return iter(self.absolute_bases[bigrade])
+        return self.monomial_counter.iterate(bigrade)
+
+    def get_abs_monomial(self, bigrade: Bidegree, index: int) -> tuple:
+        """
+        Return the exponent at a position of the absolute basis (unranking over the monomial counts).
+        """
+        if bigrade in self.absolute_bases:
+            return self.get_abs_basis(bigrade)[index]
+        return self.monomial_counter.unrank(bigrade, index)
+
+    def get_abs_index(self, bigrade: Bidegree, exponent: tuple) -> int | None:
+        """
+        Return the position of a monomial in the absolute basis at its bidegree, or None if it is not there.
+        Unless the basis is already enumerated, it is ranked over the monomial counts.
+        """
+        if not self.in_first_quadrant(bigrade):
+            return None
+        if bigrade in self.absolute_indices:
+            return self.absolute_indices[bigrade].get(tuple(exponent))
+        return self.monomial_counter.rank(bigrade, exponent)
+
+    def precompute_bases(self, x_range: Iterable[int], y_range: Iterable[int]):
+        """
+        Fill `absolute_bases` for a whole rectangle of bidegrees in one dynamic-programming sweep.
+
+        Every first-quadrant bidegree below the upper-right corner of the rectangle is computed, as the
+        lower ones are needed for quotients anyway. Bases that are already known are kept untouched.
+        """
+        x_max, y_max = max(x_range), max(y_range)
+        combinations = rectangle_integral_combinations(self.generator_bigrades, x_max, y_max, self.exponent_caps)
+        for (x, y), basis in combinations.items():
+            bigrade = Bidegree([x, y])
+            if bigrade not in self.absolute_bases:
+                ideal = self.monomial_counter.ideal
+                if ideal:
+                    basis = tuple(e for e in basis if not any(monomial_divides(m, e) for m in ideal))
+                self._store_abs_basis(bigrade, basis)
 
     def get_abs_dimension(self, bigrade: Bidegree):
+        """
+        Return the number of monomials at a bidegree. The basis itself is not enumerated.
+        """
         if not self.in_first_quadrant(bigrade):
             return 0
         if bigrade[1] == bigrade[0] == 0:
             return 1  # the scalar space
-        return len(self.get_abs_basis(bigrade))
+        if bigrade in self.absolute_bases:
+            return len(self.absolute_bases[bigrade])
+        if bigrade not in self.absolute_dimensions:
+            self.absolute_dimensions[bigrade] = self.monomial_counter.count(bigrade)
+        return self.absolute_dimensions[bigrade]
 
     def get_abs_bigrade(self, exponent: Iterable[int]) -> Bidegree:
         return Bidegree(self.generator_bigrades * IV(exponent))
@@ -100,36 +351,191 @@ class SpectralSequence:
                 return None, None
             return IV([0, 0]), DV([poly.terms()[0][1]], self.domain)
         assert not poly.is_zero
-        for exponent, coef in poly.terms():
+        for exponent in poly.monoms():
             if abs_bigrade is None:
                 abs_bigrade = self.get_abs_bigrade(exponent)
             else:
                 assert abs_bigrade == self.get_abs_bigrade(exponent)
 
-            basis = self.get_abs_basis(abs_bigrade)
-            cur = []
-            for n, i in enumerate(basis):
-                if i == exponent:
-                    cur.append(self.domain(1))
-                    cur.extend([self.domain(0)] * (len(basis) - n - 1))
-                    break
-                else:
-                    cur.append(self.domain(0))
-            if abs_coordinate is None:
-                abs_coordinate = DV(cur, self.domain) * coef
-            else:
-                abs_coordinate += DV(cur, self.domain) * coef
+        abs_coordinate = [self.domain.zero] * self.get_abs_dimension(abs_bigrade)
+        for exponent, coef in self.normal_form(poly).terms():
+            index = self.get_abs_index(abs_bigrade, exponent)
+            if index is not None:  # Otherwise the monomial is killed (or the normal form is zero)
+                abs_coordinate[index] += coef
+
+        if len(abs_coordinate) == 0:
+            return abs_bigrade, DMatrix.zeros((0, 1), self.domain)
+        abs_coordinate = DV(abs_coordinate, self.domain)
 
         return abs_bigrade, abs_coordinate
 
+    def use_result_store(self, path: str):
+        """
+        Look up and save modules, differential spans and bases in an SQLite database (see src/result_store.py).
+
+        Runs of the same spectral sequence with the same supplied differentials then reuse each other's results.
+        """
+        self.result_store = ResultStore(self, path)
+
+    def use_arena(self, path: str | None = None, min_entries: int = 4096):
+        """
+        Keep the SNF decompositions of modules with at least `min_entries` entries in a memory-mapped file.
+
+        Over GF(p), and over ZZ while entries fit in 64 bits, D, U and V are then stored as machine integers in
+        `path` rather than as Python objects. By default `path` is a temporary file, removed once no module refers
+        to it. Worker processes of `compute_region` map the same file instead of receiving copies. Modules
+        computed before the call are left as they are.
+        """
+        self.arena = Arena(path)
+        self.arena_min_entries = min_entries
+
+    def start_checkpoint(self, path: str):
+        """
+        Record this run to a checkpoint directory (see src/checkpoint.py), starting with the state reached so far.
+
+        Pages, known differential values, computed modules and enumerated bases are appended as they complete.
+        """
+        self.checkpoint = Checkpoint(self, path, append=False)
+        self.checkpoint.snapshot()
+
+    @classmethod
+    def resume(cls, path: str) -> SpectralSequence:
+        """Rebuild a run from its checkpoint directory and keep recording to it."""
+        ss = load_checkpoint(path)
+        ss.checkpoint = Checkpoint(ss, path)
+        return ss
+
+    def set_memory_budget(self, budget: int | None, directory: str | None = None):
+        """
+        Bound the modules kept in memory, counted in matrix entries (see `Module.footprint`).
+
+        Modules beyond the budget are spilled to `directory` (a temporary directory by default), pages below the
+        frontier first, and are reloaded when touched again. Differential spans cached at spilled bidegrees
+        below the frontier are dropped with them; known differential values stay in memory. None removes the
+        budget; modules that are already spilled stay on disk until they are loaded again.
+        """
+        if budget is None:
+            if self.module_store is not None:
+                self.module_store.budget = float("inf")
+            return
+        if self.module_store is None:
+            self.module_store = ModuleStore(self, budget, directory)
+            for page in self.pages[1:]:
+                for bidegree, module in page.modules.items():
+                    self.module_store.track(page.page_num, bidegree, module)
+        self.module_store.budget = budget
+        self.module_store.evict()
+
+    def memory_usage(self) -> dict[int, dict]:
+        """Per page: resident modules, their footprint in matrix entries and modules spilled to disk."""
+        return {page.page_num: page.memory_usage() for page in self.pages[1:]}
+
+    def cache_stats(self) -> dict[int, dict]:
+        """Per page: the division memo and differential span cache counters (see `Page.cache_stats`)."""
+        return {page.page_num: page.cache_stats() for page in self.pages[1:]}
+
     def add_page(self, known_diff: dict = None):
         if known_diff is None:
             known_diff = {}
         page_n = len(self.pages)
-        new_page = Page(self, page_n, known_diff, self.diff_bideg_coef * IV([page_n, 1]))
+        new_page = Page(self, page_n, known_diff, self.get_diff_bigrade(page_n))
         self.pages.append(new_page)
         return new_page
 
+    def compute_page(self, page_num: int, box) -> Page:
+        """
+        Compute E_{page_num} on a box, keeping at most two pages of modules resident.
+
+        Every module of E_r is the subquotient Z_r / B_r of the E1 coordinates (its span holds the cycles and
+        its relations the boundaries), and these are updated incrementally from E_{r-1}:
+            Z_r(b) = {z in Z_{r-1}(b) : d_{r-1}(z) in B_{r-1}(b + d_{r-1})},
+            B_r(b) = B_{r-1}(b) + d_{r-1}(Z_{r-1}(b - d_{r-1})).
+        So the pages are swept in order over the cone of bidegrees E_{page_num} on the box depends on, and the
+        modules of E_{r-1} are released as soon as E_r is built there. The pages must already be added.
+        """
+        regions = self.dependency_regions(page_num, box)
+        for r in range(1, page_num + 1):
+            page = self.pages[r]
+            for x, y in sorted(regions[r], key=lambda b: (b[0] + b[1], b)):
+                _ = page[x, y]
+            if r > 1:
+                self.pages[r - 1].release_modules()
+        return self.pages[page_num]
+
+    def dependency_regions(self, page_num: int, box) -> list[set[tuple[int, int]]]:
+        """
+        For each page r <= page_num, the first-quadrant bidegrees of E_r that E_{page_num} on the box depends on:
+        the box itself on page page_num, and b, b + d_r and b - d_r for every b of page r + 1 on page r.
+        """
+        x_range, y_range = box
+        regions: list[set[tuple[int, int]]] = [set() for _ in range(page_num + 1)]
+        regions[page_num] = {(x, y) for x in x_range for y in y_range if x >= 0 and y >= 0}
+        for r in range(page_num - 1, 0, -1):
+            dx, dy = (int(c) for c in self.get_diff_bigrade(r))
+            regions[r] = {
+                (x + sign * dx, y + sign * dy)
+                for x, y in regions[r + 1] for sign in (-1, 0, 1)
+                if x + sign * dx >= 0 and y + sign * dy >= 0
+            }
+        return regions
+
+    def get_diff_bigrade(self, page_num: int) -> Bidegree:
+        return Bidegree(self.diff_bideg_coef * IV([page_num, 1]))
+
+    def _diff_vanishes_from(self, bigrade: Bidegree, page_num: int, direction: int, horizon: int) -> bool:
+        """
+        Whether d_r out of (direction = 1) or into (direction = -1) a bidegree vanishes for degree reasons on
+        every page r >= page_num: the other end either has no monomials, or has left the first quadrant along
+        a coordinate that can only decrease further. Pages beyond `horizon` are not examined.
+        """
+        slope = [direction * self.diff_bideg_coef[0, 0], direction * self.diff_bideg_coef[1, 0]]
+        if slope == [0, 0]:
+            return self.get_abs_dimension(bigrade + direction * self.get_diff_bigrade(page_num)) == 0
+        for r in range(page_num, horizon + 1):
+            other = bigrade + direction * self.get_diff_bigrade(r)
+            if any(other[i] < 0 and slope[i] <= 0 for i in range(2)):
+                return True
+            if self.get_abs_dimension(other) != 0:
+                return False
+        return False
+
+    def is_stable_from(self, box, page_num: int, horizon: int = 64) -> bool:
+        """
+        Whether every d_r with r >= page_num whose source or target lies in the box vanishes for degree reasons,
+        so that E_{page_num} agrees with E_infinity there. The box is a pair (x_range, y_range).
+        """
+        x_range, y_range = box
+        for x in x_range:
+            for y in y_range:
+                bigrade = Bidegree([x, y])
+                if self.get_abs_dimension(bigrade) == 0:
+                    continue
+                if not self._diff_vanishes_from(bigrade, page_num, 1, horizon):
+                    return False
+                if not self._diff_vanishes_from(bigrade, page_num, -1, horizon):
+                    return False
+        return True
+
+    def run_until_stable(self, box, known_diffs: dict[int, dict] | None = None, max_page: int = 64) -> Page:
+        """
+        Add pages until the box is stable and return that page, i.e. E_infinity on the box.
+
+        Args:
+            box: pair (x_range, y_range) of bidegrees to stabilize.
+            known_diffs: page number -> known_diff for the pages that still have to be added.
+            max_page: give up (ValueError) if no page up to this one is stable.
+
+        Pages are only added, never evaluated, so no module outside what later queries need is computed.
+        """
+        if known_diffs is None:
+            known_diffs = {}
+        for page_num in range(1, max_page + 1):
+            if page_num == len(self.pages):
+                self.add_page(known_diffs.get(page_num))
+            if self.is_stable_from(box, page_num, horizon=max_page):
+                return self.pages[page_num]
+        raise ValueError(f"The box is not stable for degree reasons up to page {max_page}.")
+
 
 if __name__ == "__main__":
     from sympy.abc import symbols
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+
+from src.element import Bidegree
+
+if TYPE_CHECKING:
+    from src.page_and_module import Module, Page
+    from src.spectral_sequence import SpectralSequence
+
+Key = tuple[int, Bidegree]  # (page number, bidegree)
+
+
+def _file_name(page_num: int, bidegree: Bidegree) -> str:
+    return f"page{page_num}_{bidegree[0]}_{bidegree[1]}.pkl"
+
+
+def _remove_spilled(directory: str, owned: bool, spilled: dict[int, set[Bidegree]]):
+    if owned:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    for page_num, bidegrees in spilled.items():
+        for bidegree in bidegrees:
+            path = os.path.join(directory, _file_name(page_num, bidegree))
+            if os.path.exists(path):
+                os.remove(path)
+    spilled.clear()
+
+
+class ModuleStore:
+    """
+    Keep the resident modules of all pages under a budget, spilling the least recently used ones to disk.
+
+    Sizes are counted in matrix entries (see `Module.footprint`). When the budget is exceeded, modules on pages
+    below the frontier (the last page and the one it is computed from) are evicted first, in LRU order, then
+    the least recently used modules of any page. An evicted module is written in the form of `Module.to_data`,
+    so reloading it in `Page.__getitem__` does not recompute any decomposition. Evicting a module behind the
+    frontier also drops the differential span and info collection cached at its bidegree, which are rebuilt
+    from the module on demand; known differential values are always kept.
+
+    Spilled files are removed by `close`, or when the store is collected. A temporary directory created for
+    the store (when no directory is given) is removed with them.
+    """
+
+    def __init__(self, ss: SpectralSequence, budget: int, directory: str | None = None):
+        self.ss = ss
+        self.budget = budget
+        owned = directory is None
+        self.directory = tempfile.mkdtemp(prefix="spectral-sequence-") if owned else directory
+        os.makedirs(self.directory, exist_ok=True)
+        # Resident modules with their footprints, in LRU order (least recent first): those on pages behind the
+        # frontier and those on the frontier. Pages below `_behind_below` are behind it.
+        self._behind: OrderedDict[Key, int] = OrderedDict()
+        self._front: OrderedDict[Key, int] = OrderedDict()
+        self._behind_below = 0
+        self.resident_size = 0
+        self.spilled: dict[int, set[Bidegree]] = {}
+        self._finalizer = weakref.finalize(self, _remove_spilled, self.directory, owned, self.spilled)
+
+    def close(self):
+        """Remove the spilled modules from disk. They cannot be loaded afterwards."""
+        self._finalizer()
+
+    def _path(self, key: Key) -> str:
+        page_num, bidegree = key
+        return os.path.join(self.directory, _file_name(page_num, bidegree))
+
+    def _advance(self):
+        """Move the modules of pages that fell behind the frontier (the last two pages) to the behind LRU."""
+        behind_below = len(self.ss.pages) - 2
+        if behind_below <= self._behind_below:
+            return
+        self._behind_below = behind_below
+        for key in [k for k in self._front if k[0] < behind_below]:
+            self._behind[key] = self._front.pop(key)
+
+    def _lru(self, key: Key) -> OrderedDict[Key, int]:
+        return self._behind if key[0] < self._behind_below else self._front
+
+    def touch(self, page_num: int, bidegree: Bidegree):
+        self._advance()
+        key = (page_num, bidegree)
+        lru = self._lru(key)
+        if key in lru:
+            lru.move_to_end(key)
+
+    def track(self, page_num: int, bidegree: Bidegree, module: Module):
+        """Count a resident module against the budget, without evicting anything."""
+        self._advance()
+        key = (page_num, bidegree)
+        lru = self._lru(key)
+        self.resident_size -= lru.pop(key, 0)
+        lru[key] = module.footprint()
+        self.resident_size += lru[key]
+        self.spilled.get(page_num, set()).discard(bidegree)
+
+    def added(self, page_num: int, bidegree: Bidegree, module: Module):
+        """Record a module that was just stored on a page, then evict down to the budget."""
+        self.track(page_num, bidegree, module)
+        self.evict(protect=(page_num, bidegree))
+
+    def forget_page(self, page_num: int):
+        """Drop all resident and spilled modules of a page."""
+        for lru in (self._behind, self._front):
+            for key in [k for k in lru if k[0] == page_num]:
+                self.resident_size -= lru.pop(key)
+        for bidegree in self.spilled.pop(page_num, set()):
+            os.remove(self._path((page_num, bidegree)))
+
+    def evict(self, protect: Key | None = None):
+        self._advance()
+        while self.resident_size > self.budget:
+            key = self._oldest(self._behind, protect) or self._oldest(self._front, protect)
+            if key is None:
+                break
+            self.spill(key)
+
+    @staticmethod
+    def _oldest(lru: OrderedDict[Key, int], protect: Key | None) -> Key | None:
+        """The least recently used key other than `protect` (which is normally the most recent one)."""
+        for key in lru:
+            if key != protect:
+                return key
+        return None
+
+    def spill(self, key: Key):
+        page_num, bidegree = key
+        page = self.ss.pages[page_num]
+        module = page.modules.pop(bidegree)
+        if page_num < self._behind_below:
+            page.d.diff_span_cache.pop(bidegree, None)
+            page.d.info_collections.pop(bidegree, None)
+        with open(self._path(key), "wb") as f:
+            pickle.dump(module.to_data(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.resident_size -= self._lru(key).pop(key)
+        self.spilled.setdefault(page_num, set()).add(bidegree)
+
+    def is_spilled(self, page_num: int, bidegree: Bidegree) -> bool:
+        return bidegree in self.spilled.get(page_num, ())
+
+    def load(self, page: Page, bidegree: Bidegree) -> Module:
+        from src.page_and_module import Module
+
+        key = (page.page_num, bidegree)
+        with open(self._path(key), "rb") as f:
+            data = pickle.load(f)
+        os.remove(self._path(key))
+        self.spilled[page.page_num].discard(bidegree)
+        return Module.from_data(page, bidegree, data)
+
+    def usage(self, page_num: int) -> dict:
+        """Resident modules, their footprint in matrix entries, and spilled modules of one page."""
+        lru = self._behind if page_num < self._behind_below else self._front
+        sizes = [size for (r, _), size in lru.items() if r == page_num]
+        return {"modules": len(sizes), "entries": sum(sizes), "spilled": len(self.spilled.get(page_num, ()))}
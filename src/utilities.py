@@ -1,6 +1,9 @@
 from __future__ import annotations
 from sympy import Poly as _Poly
 from src.matrices import *
+from fractions import Fraction
+from math import floor
+from collections.abc import Iterable, Iterator
 
 verify = True
 
@@ -115,10 +118,12 @@ def convex_integral_combinations(b: IMatrix, v: IMatrix) -> tuple[tuple, ...]:
     # Step 3.2 Calculate the bounds.
     bounds = [-1] * n
     skipped_index = []
+    # The first component only bounds a coefficient when no column can compensate with a negative one.
+    x_bounded = all(b[0, j] >= 0 for j in range(n))
     for j in range(n):
         if b[1, j] > 0:
             bounds[j] = v[1] // b[1, j]
-            if b[0, j] > 0 and v[0] // b[0, j] < bounds[j]:
+            if x_bounded and b[0, j] > 0 and v[0] // b[0, j] < bounds[j]:
                 bounds[j] = v[0] // b[0, j]
             continue
         skipped_index.append(j)
@@ -161,5 +166,294 @@ def convex_integral_combinations(b: IMatrix, v: IMatrix) -> tuple[tuple, ...]:
         return tuple(res)
 
 
+def rectangle_integral_combinations(b: IMatrix, x_max: int, y_max: int,
+                                    caps: list[int | None] | None = None) -> dict[tuple[int, int], tuple[tuple, ...]]:
+    """
+    Solve the problem of `convex_integral_combinations` for every target $v$ in the rectangle
+    $[0, x_max] \\times [0, y_max]$ at once.
+
+    The same assumptions on $b$ apply. Outputs are sorted lexicographically. If `caps` is given, the coefficient
+    of column j is at most caps[j] (no bound when caps[j] is None).
+
+    Solution (unbounded knapsack over the generators):
+    Let $T_k(w)$ be the combinations of the columns $k, ..., n-1$ summing to $w$. Then
+        $T_k(w) = \\{(0, e) : e \\in T_{k+1}(w)\\} \\cup \\{(m + 1, e) : (m, e) \\in T_k(w - b_k)\\}$,
+    so each table is obtained from the previous one by a single sweep in increasing $(y, x)$ order.
+    Partial sums of columns with a negative first component can leave the rectangle horizontally, so
+    the sweep runs over a widened strip that contains every partial sum of every target.
+    """
+    n = b.cols
+    assert n > 0
+    cols = [(int(b[0, j]), int(b[1, j])) for j in range(n)]
+    for bx, by in cols:
+        assert by >= 0
+        if by == 0 and bx <= 0:
+            raise ValueError  # The first component must be positive when the second is 0
+    if caps is None:
+        caps = [None] * n
+
+    # Horizontal slack needed by partial sums: ceil(-x / y) per unit of height for columns with x < 0.
+    slack = max([(-bx + by - 1) // by for bx, by in cols if bx < 0] + [0])
+    if x_max < 0 or y_max < 0:
+        return {}
+    x_lo, x_hi = -y_max * slack, x_max + y_max * slack
+
+    table: dict[tuple[int, int], list[tuple]] = {(0, 0): [()]}
+    for k in reversed(range(n)):
+        bx, by = cols[k]
+        cap = caps[k]
+        new_table: dict[tuple[int, int], list[tuple]] = {}
+        for y in range(y_max + 1):
+            for x in range(x_lo, x_hi + 1):
+                cur = [(0,) + e for e in table.get((x, y), ())]
+                cur.extend(
+                    (e[0] + 1,) + e[1:] for e in new_table.get((x - bx, y - by), ())
+                    if cap is None or e[0] < cap
+                )
+                if cur:
+                    new_table[(x, y)] = cur
+        table = new_table
+
+    return {
+        (x, y): tuple(table.get((x, y), ()))
+        for x in range(x_max + 1)
+        for y in range(y_max + 1)
+    }
+
+
+class CombinationCounter:
+    """
+    Count the solutions of `convex_integral_combinations` without listing them.
+
+    Let $C_k(w)$ be the number of combinations of the columns $k, ..., n-1$ of $b$ summing to $w$. Then
+        $C_n(w) = [w = 0]$ and $C_k(w) = \\sum_{m \\geq 0} C_{k+1}(w - m b_k)$,
+    which is memoized over $(k, w)$. A suffix of columns with heights summing to $Y > 0$ has first component
+    at least $Y$ times the least slope $x / y$ among its columns with $y > 0$; targets below that line are
+    pruned, which also bounds the coefficients of columns of the form $(x, 0)$.
+
+    If `caps` is given, the coefficient of column j is at most caps[j] (no bound when caps[j] is None).
+    """
+
+    def __init__(self, b: IMatrix, caps: list[int | None] | None = None):
+        self.cols = [(int(b[0, j]), int(b[1, j])) for j in range(b.cols)]
+        for bx, by in self.cols:
+            assert by >= 0
+            if by == 0 and bx <= 0:
+                raise ValueError  # The first component must be positive when the second is 0
+        self.caps = list(caps) if caps is not None else [None] * len(self.cols)
+        assert len(self.caps) == len(self.cols)
+
+        # least_slope[k]: minimal x / y over columns k, ..., n-1 with y > 0 (None if there is none)
+        self.least_slope: list[Fraction | None] = [None] * (len(self.cols) + 1)
+        for k in reversed(range(len(self.cols))):
+            bx, by = self.cols[k]
+            cur = self.least_slope[k + 1]
+            if by > 0 and (cur is None or Fraction(bx, by) < cur):
+                cur = Fraction(bx, by)
+            self.least_slope[k] = cur
+        self._cache: dict[tuple[int, int, int], int] = {}
+
+    def _reachable(self, k: int, x: int, y: int) -> bool:
+        """Cheap necessary condition for C_k((x, y)) > 0."""
+        if y < 0:
+            return False
+        if y == 0:
+            return x >= 0
+        slope = self.least_slope[k]
+        return slope is not None and x >= y * slope
+
+    def count(self, v, k: int = 0) -> int:
+        x, y = int(v[0]), int(v[1])
+        n = len(self.cols)
+        if k == n:
+            return 1 if x == 0 and y == 0 else 0
+        if not self._reachable(k, x, y):
+            return 0
+        key = (k, x, y)
+        if key in self._cache:
+            return self._cache[key]
+
+        bx, by = self.cols[k]
+        res = sum(self.count((x - m * bx, y - m * by), k + 1) for m in self._coefficient_range(k, x, y))
+        self._cache[key] = res
+        return res
+
+    def _coefficient_range(self, k: int, x: int, y: int) -> range:
+        """Candidate coefficients of column k for the target (x, y), assumed reachable."""
+        bx, by = self.cols[k]
+        if by > 0:
+            m_max = y // by
+        else:
+            lower = 0 if y == 0 else y * self.least_slope[k + 1]
+            m_max = floor((x - lower) / bx)
+        if self.caps[k] is not None:
+            m_max = min(m_max, self.caps[k])
+        return range(m_max + 1)
+
+    def iterate(self, v, k: int = 0) -> Iterator[tuple]:
+        """Yield the combinations of the columns k, ..., n-1 summing to v in lexicographic order."""
+        x, y = int(v[0]), int(v[1])
+        if k == len(self.cols):
+            if x == 0 and y == 0:
+                yield ()
+            return
+        if self.count((x, y), k) == 0:
+            return
+        bx, by = self.cols[k]
+        for m in self._coefficient_range(k, x, y):
+            for rest in self.iterate((x - m * bx, y - m * by), k + 1):
+                yield (m,) + rest
+
+    def unrank(self, v, index: int) -> tuple:
+        """Return the combination at position `index` in the lexicographic order of `iterate(v)`."""
+        x, y = int(v[0]), int(v[1])
+        if not 0 <= index < self.count((x, y)):
+            raise IndexError(f"Index {index} out of range for target ({x}, {y}).")
+        res = []
+        for k, (bx, by) in enumerate(self.cols):
+            for m in self._coefficient_range(k, x, y):
+                c = self.count((x - m * bx, y - m * by), k + 1)
+                if index < c:
+                    break
+                index -= c
+            res.append(m)
+            x, y = x - m * bx, y - m * by
+        return tuple(res)
+
+    def rank(self, v, exponent: Iterable[int]) -> int | None:
+        """Return the position of `exponent` in the lexicographic order of `iterate(v)`, or None if absent."""
+        x, y = int(v[0]), int(v[1])
+        exponent = tuple(exponent)
+        if len(exponent) != len(self.cols) or any(e < 0 for e in exponent):
+            return None
+        if any(cap is not None and e > cap for e, cap in zip(exponent, self.caps)):
+            return None
+        if sum(e * bx for e, (bx, _) in zip(exponent, self.cols)) != x \
+                or sum(e * by for e, (_, by) in zip(exponent, self.cols)) != y:
+            return None
+        res = 0
+        for k, (bx, by) in enumerate(self.cols):
+            res += sum(self.count((x - m * bx, y - m * by), k + 1) for m in range(exponent[k]))
+            x, y = x - exponent[k] * bx, y - exponent[k] * by
+        return res
+
+
+def monomial_divides(m: tuple, e: tuple) -> bool:
+    """Whether the monomial with exponent m divides the one with exponent e."""
+    return all(i <= j for i, j in zip(m, e))
+
+
+def minimal_monomials(monomials: Iterable[tuple]) -> tuple[tuple, ...]:
+    """Return the minimal generators (under divisibility) of the monomial ideal generated by exponents."""
+    res: list[tuple] = []
+    for m in sorted(set(monomials), key=sum):
+        if not any(monomial_divides(g, m) for g in res):
+            res.append(m)
+    return tuple(res)
+
+
+class StandardMonomialCounter:
+    """
+    Count and list the combinations of `CombinationCounter` whose exponent is not divisible by any of the
+    monomials in `ideal`, i.e. the standard monomials modulo a monomial ideal.
+
+    Counting uses the colon recursion for Hilbert functions of monomial ideals: writing $I = I' + (m)$,
+        $H_I(v) = H_{I'}(v) - H_{I' : m}(v - \\deg m)$,
+    where the second term counts the multiples $m u$ outside $I'$. Height caps are lowered by the exponent of
+    $m$ in that term, so each cap combination gets its own `CombinationCounter`.
+
+    Ranking and unranking follow `CombinationCounter`: once the exponents of the columns before k are fixed to
+    p, the standard completions are counted over the columns k, ..., n-1 modulo the ideal generated by the
+    tails m[k:] of the monomials m with m[:k] dividing p.
+    """
+
+    def __init__(self, b: IMatrix, caps: list[int | None] | None = None, ideal: Iterable[tuple] = ()):
+        self.b = b
+        self.caps = tuple(caps) if caps is not None else (None,) * b.cols
+        self.ideal = minimal_monomials(ideal)
+        self.cols = [(int(b[0, j]), int(b[1, j])) for j in range(b.cols)]
+        self._counters: dict[tuple, CombinationCounter] = {}
+        self._cache: dict[tuple, int] = {}
+
+    def counter(self, caps: tuple | None = None) -> CombinationCounter:
+        caps = self.caps if caps is None else caps
+        if caps not in self._counters:
+            self._counters[caps] = CombinationCounter(self.b, list(caps))
+        return self._counters[caps]
+
+    def count(self, v) -> int:
+        return self._count(self.caps, self.ideal, int(v[0]), int(v[1]))
+
+    def _count(self, caps: tuple, ideal: tuple[tuple, ...], x: int, y: int, k: int = 0) -> int:
+        """Standard monomials over the columns k, ..., n-1 (the ideal has zero exponents before k)."""
+        if len(ideal) == 0:
+            return self.counter(caps).count((x, y), k)
+        key = (caps, ideal, x, y, k)
+        if key in self._cache:
+            return self._cache[key]
+
+        m, rest = ideal[-1], ideal[:-1]
+        res = self._count(caps, rest, x, y, k)
+        # Multiples of m vanish anyway if m exceeds a cap.
+        if not any(c is not None and e > c for e, c in zip(m, caps)):
+            colon = minimal_monomials(tuple(max(i - j, 0) for i, j in zip(n, m)) for n in rest)
+            if not any(sum(g) == 0 for g in colon):
+                shifted_caps = tuple(None if c is None else c - e for e, c in zip(m, caps))
+                dx = sum(e * bx for e, (bx, _) in zip(m, self.cols))
+                dy = sum(e * by for e, (_, by) in zip(m, self.cols))
+                res -= self._count(shifted_caps, colon, x - dx, y - dy, k)
+        self._cache[key] = res
+        return res
+
+    def _count_completions(self, prefix: tuple, x: int, y: int) -> int:
+        """Standard monomials starting with the exponents `prefix` whose remaining columns sum to (x, y)."""
+        k = len(prefix)
+        tails = minimal_monomials((0,) * k + m[k:] for m in self.ideal if monomial_divides(m[:k], prefix))
+        if any(sum(g) == 0 for g in tails):
+            return 0
+        return self._count(self.caps, tails, x, y, k)
+
+    def unrank(self, v, index: int) -> tuple:
+        """Return the standard monomial at position `index` in the order of `iterate(v)`."""
+        x, y = int(v[0]), int(v[1])
+        if not 0 <= index < self.count((x, y)):
+            raise IndexError(f"Index {index} out of range for target ({x}, {y}).")
+        counter = self.counter()
+        res = ()
+        for k, (bx, by) in enumerate(self.cols):
+            for m in counter._coefficient_range(k, x, y):
+                c = self._count_completions(res + (m,), x - m * bx, y - m * by)
+                if index < c:
+                    break
+                index -= c
+            res += (m,)
+            x, y = x - m * bx, y - m * by
+        return res
+
+    def rank(self, v, exponent: Iterable[int]) -> int | None:
+        """Return the position of `exponent` in the order of `iterate(v)`, or None if it is not listed there."""
+        exponent = tuple(exponent)
+        if self.counter().rank(v, exponent) is None or not self.is_standard(exponent):
+            return None
+        x, y = int(v[0]), int(v[1])
+        res = 0
+        for k, (bx, by) in enumerate(self.cols):
+            prefix = exponent[:k]
+            res += sum(self._count_completions(prefix + (m,), x - m * bx, y - m * by) for m in range(exponent[k]))
+            x, y = x - exponent[k] * bx, y - exponent[k] * by
+        return res
+
+    def is_standard(self, e: tuple) -> bool:
+        """Whether the monomial with exponent e is within the caps and outside the ideal."""
+        if any(c is not None and i > c for i, c in zip(e, self.caps)):
+            return False
+        return not any(monomial_divides(m, e) for m in self.ideal)
+
+    def iterate(self, v) -> Iterator[tuple]:
+        for e in self.counter().iterate(v):
+            if not any(monomial_divides(m, e) for m in self.ideal):
+                yield e
+
+
 if __name__ == "__main__":
     print(convex_integral_combinations(IM([[1, 2], [3, 4]]), IV([0, 0])))
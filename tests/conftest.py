@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import inspect
+
+import pytest
+from sympy import ZZ
+from sympy.abc import a, t
+
+
+@pytest.fixture
+def spy(monkeypatch):
+    """
+    Count calls without changing behavior: `spy(owner, name)` wraps the method or function `name` of `owner` and
+    returns a list that receives `(args, result)` for every call, where `args` includes `self` for methods looked
+    up on a class.
+    """
+
+    def install(owner, name: str) -> list[tuple[tuple, object]]:
+        calls = []
+        original = getattr(owner, name)
+
+        def wrapper(*args):
+            result = original(*args)
+            calls.append((args, result))
+            return result
+
+        if isinstance(inspect.getattr_static(owner, name), staticmethod):
+            wrapper = staticmethod(wrapper)
+        monkeypatch.setattr(owner, name, wrapper)
+        return calls
+
+    return install
+
+
+@pytest.fixture
+def build_ss():
+    """
+    Build the example most tests share: a in bidegree (3, 0) and t in (0, 2) with a**2 = 0, on four pages with
+    d_1 = d_2 = 0 and d_3(t) = a. `build_ss(domain, ...)` varies it:
+
+    - `degrees`, `relations` and `pages` replace the generator bidegrees, the killed relations and the
+      differentials supplied to each `add_page` call;
+    - `setup(ss)` runs before the first page is added, e.g. to start a checkpoint or use an arena.
+    """
+
+    def build(domain=ZZ, *, degrees=((3, 0), (0, 2)), relations=(a**2,), pages=None, setup=None):
+        from src.spectral_sequence import SpectralSequence
+
+        if pages is None:
+            pages = ({a: 0, t: 0}, {a: 0, t: 0}, {t: a, a: 0}, {})
+        ss = SpectralSequence(domain, [a, t], [list(row) for row in degrees], [[1, 0], [-1, 1]])
+        ss.kill(*relations)
+        if setup is not None:
+            setup(ss)
+        for known in pages:
+            ss.add_page(known)
+        return ss
+
+    return build
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from sympy import GF, ZZ
+from sympy.abc import a, b, t
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for path in (SRC, ROOT):
+    path_str = str(path)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+from src.element import Bidegree, HomoElem  # noqa: E402
+from src.spectral_sequence import SpectralSequence  # noqa: E402
+
+
+def _three_generator_ss():
+    # The negative first component of b exercises partial sums leaving the rectangle.
+    return SpectralSequence(ZZ, [a, b, t], [[1, -1, 2], [0, 2, 1]], [[1, 0], [-1, 1]])
+
+
+def test_precomputed_bases_agree_with_pointwise_enumeration():
+    pre = _three_generator_ss()
+    pre.precompute_bases(range(0, 7), range(0, 6))
+
+    ref = _three_generator_ss()
+    for x in range(7):
+        for y in range(6):
+            bideg = Bidegree([x, y])
+            assert bideg in pre.absolute_bases
+            assert pre.absolute_bases[bideg] == ref.get_abs_basis(bideg)
+            for i, exponent in enumerate(ref.get_abs_basis(bideg)):
+                assert pre.get_abs_index(bideg, exponent) == i
+
+
+def test_precompute_keeps_existing_bases():
+    ss = _three_generator_ss()
+    existing = ss.get_abs_basis(Bidegree([2, 2]))
+    ss.precompute_bases(range(0, 4), range(0, 4))
+    assert ss.absolute_bases[Bidegree([2, 2])] is existing
+
+
+def test_dimension_is_counted_without_enumerating_the_basis():
+    ss = _three_generator_ss()
+    ref = _three_generator_ss()
+    for x in range(7):
+        for y in range(6):
+            bideg = Bidegree([x, y])
+            assert ss.get_abs_dimension(bideg) == ref.get_abs_dimension(bideg) == len(ref.get_abs_basis(bideg))
+    assert ss.absolute_bases == {}
+
+
+def test_streaming_basis_supports_rank_and_unrank():
+    ss = _three_generator_ss()
+    ref = _three_generator_ss()
+    bideg = Bidegree([5, 6])
+    expected = ref.get_abs_basis(bideg)
+
+    assert tuple(ss.iter_abs_basis(bideg)) == expected
+    for i, exponent in enumerate(expected):
+        assert ss.get_abs_monomial(bideg, i) == exponent
+        assert ss.get_abs_index(bideg, exponent) == i
+    assert ss.get_abs_index(bideg, (0, 0, 0)) is None
+    assert ss.absolute_bases == {}
+
+
+def test_height_caps_prune_enumeration_and_counting():
+    capped = SpectralSequence(ZZ, [a, b, t], [[1, -1, 2], [0, 2, 1]], [[1, 0], [-1, 1]], exponent_caps={t: 2})
+    capped.kill(a**2)
+    assert capped.relations == []
+    assert capped.exponent_caps == [1, None, 2]
+
+    ref = _three_generator_ss()
+    precomputed = SpectralSequence(ZZ, [a, b, t], [[1, -1, 2], [0, 2, 1]], [[1, 0], [-1, 1]],
+                                   exponent_caps={a: 1, t: 2})
+    precomputed.precompute_bases(range(0, 7), range(0, 6))
+    for x in range(7):
+        for y in range(6):
+            bideg = Bidegree([x, y])
+            expected = tuple(e for e in ref.get_abs_basis(bideg) if e[0] <= 1 and e[2] <= 2)
+            assert capped.get_abs_dimension(bideg) == len(expected)
+            assert capped.get_abs_basis(bideg) == expected
+            assert precomputed.get_abs_basis(bideg) == expected
+
+
+def test_non_unit_power_is_kept_as_relation():
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(2 * a**2)
+    assert ss.exponent_caps == [None, None]
+    assert len(ss.relations) == 1
+
+
+def test_monomial_relations_are_deleted_from_the_bases():
+    ss = SpectralSequence(ZZ, [a, b, t], [[1, -1, 2], [0, 2, 1]], [[1, 0], [-1, 1]], exponent_caps={t: 3})
+    ss.kill(a * t, b**2 * t**2)
+    assert ss.relations == []
+    assert ss.killed_monomials == ((1, 0, 1), (0, 2, 2))
+
+    ref = _three_generator_ss()
+    pre = SpectralSequence(ZZ, [a, b, t], [[1, -1, 2], [0, 2, 1]], [[1, 0], [-1, 1]], exponent_caps={t: 3})
+    pre.kill(a * t, b**2 * t**2)
+    pre.precompute_bases(range(0, 7), range(0, 8))
+    for x in range(7):
+        for y in range(8):
+            bideg = Bidegree([x, y])
+            expected = tuple(
+                e for e in ref.get_abs_basis(bideg)
+                if e[2] <= 3 and not (e[0] >= 1 and e[2] >= 1) and not (e[1] >= 2 and e[2] >= 2)
+            )
+            assert ss.get_abs_dimension(bideg) == len(expected)
+            assert tuple(ss.iter_abs_basis(bideg)) == expected
+            assert pre.get_abs_basis(bideg) == expected
+
+
+def test_streaming_rank_and_unrank_skip_killed_monomials():
+    ss = SpectralSequence(ZZ, [a, b, t], [[1, -1, 2], [0, 2, 1]], [[1, 0], [-1, 1]], exponent_caps={t: 3})
+    ss.kill(a * t, b**2 * t**2)
+    ref = SpectralSequence(ZZ, [a, b, t], [[1, -1, 2], [0, 2, 1]], [[1, 0], [-1, 1]], exponent_caps={t: 3})
+    ref.kill(a * t, b**2 * t**2)
+
+    for x in range(7):
+        for y in range(8):
+            bideg = Bidegree([x, y])
+            for i, exponent in enumerate(ref.get_abs_basis(bideg)):
+                assert ss.get_abs_monomial(bideg, i) == exponent
+                assert ss.get_abs_index(bideg, exponent) == i
+    assert ss.get_abs_index(Bidegree([3, 1]), (1, 0, 1)) is None
+    assert ss.absolute_bases == {}
+
+
+def test_monomial_relation_gives_relation_free_first_page():
+    ss = SpectralSequence(ZZ, [a, t], [[1, 0], [0, 1]], [[1, 0], [-1, 1]])
+    ss.kill(a * t)
+    p1 = ss.add_page({a: 0, t: 0})
+
+    module = p1[1, 1]
+    assert module.R is None
+    assert module.S is None
+    assert p1[2, 0].S.shape == (1, 1)
+    assert ss.get_abs_dimension(Bidegree([2, 1])) == 0
+    assert HomoElem(p1, a**2 * t).coordinate.shape == (0, 1)
+
+
+def test_groebner_normal_forms_over_a_field():
+    ss = SpectralSequence(GF(5), [a, b], [[1, 1], [0, 0]], [[1, 0], [-1, 1]])
+    ss.kill(a * b - b**2, a**3)
+    p1 = ss.add_page({a: 0, b: 0})
+
+    # k[a, b]/(ab - b^2, a^3) has Hilbert function 1, 2, 2, 1, 0, ...
+    dims = [ss.get_abs_dimension(Bidegree([n, 0])) for n in range(6)]
+    assert dims == [1, 2, 2, 1, 0, 0]
+    assert ss.get_ker_basis(Bidegree([2, 0])) == []
+    assert p1[2, 0].R is None
+
+    assert HomoElem(p1, a * b).coordinate == HomoElem(p1, b**2).coordinate
+    # Elements hold normal forms, so the same class is one element, also as a key.
+    assert HomoElem(p1, a * b) == HomoElem(p1, b**2)
+    assert len({HomoElem(p1, a * b): 0, HomoElem(p1, b**2): 1}) == 1
+    assert HomoElem(p1, a * b - b**2).isZero()
+    assert HomoElem(p1, a**2 * b).coordinate == HomoElem(p1, b**3).coordinate
+    assert p1[3, 0].classify(HomoElem(p1, a**2 * b - b**3).coordinate) == 0
+
+
+def test_ker_basis_is_batched_deduplicated_and_cached(capsys):
+    ss = SpectralSequence(ZZ, [a, b], [[1, 1], [0, 0]], [[1, 0], [-1, 1]])
+    ss.kill(a * b - b**2, a * b - b**2, 2 * a * b - 2 * b**2)
+    bideg = Bidegree([3, 0])
+
+    columns = ss.get_ker_basis(bideg)
+    # b and a times a*b - b^2; the doubled relation adds two more columns and the repeated one none.
+    assert len(columns) == 4
+    assert len({tuple(c.to_list_flat()) for c in columns}) == 4
+    assert ss.get_ker_basis(bideg) is columns
+    assert capsys.readouterr().out == ""
+
+    index = {e: ss.get_abs_index(bideg, e) for e in ss.get_abs_basis(bideg)}
+    first = [0] * 4
+    first[index[(1, 2)]], first[index[(0, 3)]] = 1, -1
+    assert columns[0].to_list_flat() == first
+
+
+def test_ker_basis_uses_multipliers_of_negative_bidegree():
+    ss = _three_generator_ss()
+    ss.kill(t**2 - a**5 * b)
+    p1 = ss.add_page()
+    bideg = Bidegree([3, 4])
+
+    # t^2 - a^5*b = b * (t^2 - a^5*b), and b has bidegree (-1, 2) outside the first quadrant.
+    assert ss.get_abs_basis(bideg) == ((0, 1, 2), (5, 2, 0))
+    assert [c.to_list_flat() for c in ss.get_ker_basis(bideg)] == [[1, -1]]
+    _, torsion = p1[3, 4].get_structural_information()
+    assert torsion == [0]
@@ -4,8 +4,8 @@ import sys
 from pathlib import Path
 
 import pytest
-from sympy import GF
-from sympy.abc import a, u
+from sympy import GF, ZZ
+from sympy.abc import a, t, u
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -36,3 +36,124 @@ def test_accepts_zero_image_of_relation_trivial_source():
 
     page = ss.add_page({u**2: 0})
     assert page.page_num == 2
+
+
+def test_merges_read_each_known_value_once(spy):
+    from src.differential import DiffInfo
+
+    merges = spy(DiffInfo, "changes_since")
+
+    ss = SpectralSequence(GF(2), [a, u], [[2, 0], [0, 1]], [[1, 0], [-1, 1]])
+    ss.kill(a**4)
+    ss.add_page({a: 0, u: 0})
+    page = ss.add_page({u: a, a: 0, u * a: a**2, u * a**2: a**3})
+
+    # Every value, given or inferred, passes through the merges exactly once.
+    read = [(info.page.page_num, src) for (info, _), changes in merges for src, _ in changes]
+    assert len(read) == len(set(read)) == len(ss.pages[1].d.diff_info) + len(page.d.diff_info)
+    assert page.d.info == dict(page.d.diff_info.items())
+
+
+def test_new_values_only_invalidate_caches_at_their_bidegree():
+    from sympy.abc import b
+    from src.element import HomoElem
+
+    ss = SpectralSequence(GF(2), [a, b, u], [[2, 2, 0], [0, 0, 1]], [[1, 0], [-1, 1]])
+    ss.kill(u**2)
+    ss.add_page({a: 0, b: 0, u: 0})
+    page = ss.add_page({u: a, a: 0, b: 0})
+    spans = {x: page.d.get_diff_span(page._normalize_bidegree((x, 1))) for x in (0, 2, 4)}
+    assert (page.d.invalidations, page.d.recomputations) == (0, 0)
+
+    # A new source at (2, 1) drops only the caches there.
+    assert page.d._add_info_pair(HomoElem(page, (a + b) * u), HomoElem(page, a**2 + a * b))
+    assert {x for x in spans if page._normalize_bidegree((x, 1)) in page.d.diff_span_cache} == {0, 4}
+    assert page.d.invalidations >= 1
+
+    assert page.d.get_diff_span(page._normalize_bidegree((2, 1))).coords == spans[2].coords
+    assert page.d.recomputations == 1
+
+
+def test_inference_only_divides_by_lowest_sources_with_nonempty_quotients(spy):
+    from sympy import ZZ
+    from sympy.abc import t
+    from src.element import HomoElem
+
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(a**2)
+    ss.add_page({a: 0, t: 0})
+    ss.add_page({a: 0, t: 0})
+    page = ss.add_page({t: a, a: 0})
+    assert {str(s) for s in page.d.diff_info.lowest_sources()} == {"a", "t"}
+
+    divisions = spy(page, "divide")
+    assert page.d.diff_info.query_d(HomoElem(page, t**5)) == HomoElem(page, 5 * a * t**4)
+    divided = [y.bidegree - x.bidegree for (x, y), _ in divisions]
+
+    # a cannot divide powers of t: the quotient bidegree (-3, 2k) has no monomials.
+    assert divided and all(ss.get_abs_dimension(q) > 0 for q in divided)
+
+
+def test_divisor_lookup_visits_only_the_cone_and_builds_no_modules(spy, build_ss):
+    from sympy.abc import t
+    from src.element import HomoElem
+
+    page = build_ss(pages=({a: 0, t: 0}, {a: 0, t: 0}, {t: a, a: 0})).pages[-1]
+    info = page.d.diff_info
+    assert sorted(info._lowest_by_bideg) == [(0, 2), (3, 0)]
+
+    # Below (3, 4) lie (3, 0) and (0, 2); below (0, 6) only (0, 2), as nothing has a negative first component.
+    assert sorted(key for key, _ in info._groups_below(3, 4)) == [(0, 2), (3, 0)]
+    assert [key for key, _ in info._groups_below(0, 6)] == [(0, 2)]
+    assert [key for key, _ in info._groups_above(3, 0)] == [(3, 0)]
+
+    generated = spy(type(page), "generate_module")
+    bideg = page._normalize_bidegree((0, 8))
+    assert bideg not in page.modules
+    assert not info._compares_supports(HomoElem(page, t**4))
+    assert generated == [] and bideg not in page.modules
+
+
+def test_add_many_validates_in_batch_and_propagates_once(spy):
+    from src.differential import DiffInfo
+    from src.element import HomoElem
+
+    ss = SpectralSequence(GF(2), [a, u], [[2, 0], [0, 1]], [[1, 0], [-1, 1]])
+    ss.kill(a**4)
+    ss.kill(u**2)
+    ss.add_page({a: 0, u: 0})
+    page = ss.add_page()
+    known = len(page.d.diff_info)
+
+    drains = spy(DiffInfo, "_drain")
+
+    # The invalid last pair rejects the whole batch before anything is recorded.
+    pairs = [(HomoElem(page, u), HomoElem(page, a)), (HomoElem(page, a), HomoElem(page, 0)),
+             (HomoElem(page, u**2), HomoElem(page, a * u))]
+    with pytest.raises(ValueError, match="must be zero"):
+        page.d.add_many(pairs)
+    assert len(page.d.diff_info) == known and drains == []
+
+    assert page.d.add_many(pairs[:2] + [(HomoElem(page, u * a), HomoElem(page, a**2))]) == 3
+    assert len(drains) == 1
+    assert page.d.info[HomoElem(page, u * a)] == HomoElem(page, a**2)
+    assert page.d.add_many({HomoElem(page, u): HomoElem(page, a)}) == 0
+
+
+def test_add_many_rolls_back_when_inference_conflicts():
+    from src.element import HomoElem
+
+    ss = SpectralSequence(ZZ, [a, t], [[1, 0], [0, 1]], [[1, 0], [-1, 1]])
+    page = ss.add_page()
+    known = page.d.diff_info.sources()
+
+    # d(2t) = 2at gives d(t) = at by dividing by 2, which contradicts d(t) = 3at only while draining.
+    pairs = [(HomoElem(page, 2 * t), HomoElem(page, 2 * a * t)), (HomoElem(page, t), HomoElem(page, 3 * a * t))]
+    with pytest.raises(ValueError, match="Conflicting"):
+        page.d.add_many(pairs)
+    assert page.d.diff_info.sources() == known
+    assert page.d.diff_info.changes_since(0) == [(src, page.d.diff_info.get(src)) for src in known]
+    assert page.d.info.keys() == set(known)
+
+    assert page.d.add_many(pairs[:1]) == 1
+    assert page.d.info[HomoElem(page, t)] == HomoElem(page, a * t)
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import inspect
+import os
 import sys
 from pathlib import Path
 
-from sympy import ZZ
-from sympy.abc import a, t
+import pytest
+from sympy import GF, ZZ
+from sympy.abc import a, b, t
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -40,13 +43,25 @@ def test_structural_information_uses_basis_not_raw_spanning_set():
 
 
 def test_structural_information_omits_unit_torsion_zero_summands():
+    # a + b and a + 2b generate the whole of ZZ{a, b}, so both summands have unit torsion.
+    ss = SpectralSequence(ZZ, [a, b], [[1, 1], [0, 0]], [[1, 0], [-1, 1]])
+    ss.kill(a + b, a + 2 * b)
+    ss.add_page({a: 0, b: 0})
+    p2 = ss.add_page({a: 0, b: 0})
+
+    info = p2[1, 0].get_structural_information()
+    assert info == ([], [])
+
+
+def test_killed_power_has_no_ambient_coordinates():
     ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
     ss.kill(a**2)
     ss.add_page({a: 0, t: 0})
     p2 = ss.add_page({a: 0, t: 0})
 
-    info = p2[6, 0].get_structural_information()
-    assert info == ([], [])
+    assert ss.relations == []
+    assert ss.get_abs_dimension(p2._normalize_bidegree((6, 0))) == 0
+    assert p2[6, 0].get_structural_information() is None
 
 
 def test_structural_information_keeps_actual_torsion_summands():
@@ -99,3 +114,312 @@ def test_division_ambiguity_extracts_basis_before_quotient_structure():
     reduced = p1._kernel_mod_relations(dependent_kernel, quotient_module)
     assert reduced.shape == (1, 1)
     assert quotient_module.classify(reduced.extract_columns([0])) == 1
+
+
+def test_modules_are_shared_across_pages_with_vanishing_differentials():
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(a**2)
+    p1 = ss.add_page({a: 0, t: 0})
+    p2 = ss.add_page({a: 0, t: 0})
+    p3 = ss.add_page({t: a, a: 0})
+    p4 = ss.add_page()
+
+    assert p2[3, 2].S is p1[3, 2].S
+    assert p3[3, 2].S is p2[3, 2].S
+    assert p3[3, 2].page is p3
+    # d3(t) = a hits (3, 0), so E4 there is recomputed.
+    assert p4[3, 0].S is not p3[3, 0].S
+    assert p4[3, 0].classify(p3[3, 0].S.extract_columns([0])) == 0
+
+
+def test_run_until_stable_stops_at_first_stable_page():
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(a**2)
+    box = (range(0, 9), range(0, 9))
+    stable = ss.run_until_stable(box, {1: {a: 0, t: 0}, 2: {a: 0, t: 0}, 3: {t: a, a: 0}})
+
+    assert stable.page_num == 4
+    assert len(ss.pages) == 5
+    assert list(stable.modules) == [stable._normalize_bidegree((0, 0))]  # only from validating d(1) = 0
+    assert not ss.is_stable_from(box, 3)
+    gens, torsion = stable[3, 2].get_structural_information()
+    assert torsion == [ZZ(2)]
+
+
+def test_compute_page_sweeps_pages_and_releases_earlier_modules(build_ss):
+    swept, ref = build_ss(), build_ss()
+    box = (range(0, 5), range(0, 7))
+    p4 = swept.compute_page(4, box)
+
+    assert all(len(swept.pages[r].modules) == 0 for r in (1, 2))
+    for x in box[0]:
+        for y in box[1]:
+            assert p4[x, y].get_structural_information() == ref.pages[4][x, y].get_structural_information()
+
+
+def test_relative_coordinates_round_trip_through_the_span_basis():
+    ss = SpectralSequence(ZZ, [a, b], [[1, 1], [0, 0]], [[1, 0], [-1, 1]])
+    p1 = ss.add_page({a: 0, b: 0})
+    bideg = p1._normalize_bidegree((2, 0))
+
+    # A rank-2 span inside the rank-3 ambient, given by three dependent columns.
+    module = Module(
+        p1,
+        bideg,
+        [DV([2, 0, 0], ZZ), DV([0, 1, 1], ZZ), DV([2, 1, 1], ZZ)],
+        [DV([4, 0, 0], ZZ)],
+    )
+    assert module.rank == 2
+    assert module.basis.shape == (3, 2)
+    assert module.R_rel.shape == (2, 1)
+
+    v = DV([6, 3, 3], ZZ)
+    c = module.to_relative(v)
+    assert c.shape == (2, 1)
+    assert module.to_absolute(c) == v
+    assert module.to_relative(DV([1, 0, 0], ZZ)) is None
+    assert module.to_relative(DV([0, 1, 0], ZZ)) is None
+
+    assert module.classify(DV([1, 0, 0], ZZ)) == 2
+    assert module.classify(DV([2, 0, 0], ZZ)) == 1
+    assert module.classify(DV([8, 0, 0], ZZ)) == 0
+    gens, torsion = module.get_structural_information()
+    assert sorted(torsion) == [ZZ(0), ZZ(2)]
+
+
+def test_later_page_modules_are_decomposed_relative_to_the_previous_basis(spy):
+    from sympy import symbols
+    from src.element import HomoElem
+    from src.snf import SNF
+
+    p, q, s, w, v = symbols("p q s w v")
+    ss = SpectralSequence(ZZ, [p, q, s, w, v], [[2, 3, 0, 0, 0], [0, 0, 1, 2, 2]], [[1, 0], [-1, 1]])
+    ss.kill(p**2, q**2, s**3, w**2, v**2)
+    ss.add_page({p: 0, q: 0, s: 0, w: 0, v: 0})
+    ss.add_page({s: p, p: 0, q: 0, w: 0, v: 0})
+    p3 = ss.add_page({w: q, p: 0, q: 0, v: 0})
+    p4 = ss.add_page()
+    # E1 at (0, 2) is spanned by s**2, w and v; d2(s**2) = 2ps leaves w and v, and d3(w) = q leaves v.
+    bideg = p4._normalize_bidegree((0, 2))
+    assert ss.get_abs_dimension(bideg) == 3 and p3[bideg].rank == 2
+    _ = p3[3, 0], p3.d.get_diff_span(bideg)
+
+    decomposed = spy(SNF, "decomp")
+    module = p4[bideg]
+    assert module.ambient_page == 3 and module.S.shape == (2, 1)
+    assert decomposed and all(args[0].shape[0] <= 2 for args, _ in decomposed)
+
+    # Absolute coordinates only appear in the exported span and basis.
+    assert module.span.coords == [p3[bideg].to_absolute(module.S)]
+    assert module.basis.shape == (3, 1)
+    gens, torsion = module.get_structural_information()
+    assert torsion == [0] and gens[0] in (HomoElem(p4, v).coordinate, -HomoElem(p4, v).coordinate)
+    assert module.classify(HomoElem(p4, v).coordinate) == 1
+    assert module.classify(HomoElem(p3, w).coordinate) == 2
+    assert module.to_relative(gens[0]) == DM([[1]], ZZ)
+
+
+def test_deep_pages_are_built_without_recursing_through_earlier_pages():
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(a**2)
+    for _ in range(60):
+        ss.add_page({a: 0, t: 0})
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 100)
+    try:
+        module = ss.pages[60][3, 4]
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert module.get_structural_information()[1] == [ZZ.zero]
+    # Every page from 1 to 60 holds its module at (3, 4), computed exactly once.
+    assert all(ss.pages[r].modules[module.bideg].page is ss.pages[r] for r in range(1, 61))
+
+
+def test_compute_region_in_worker_processes_matches_serial_computation(build_ss):
+    box = (range(0, 7), range(0, 9))
+    for domain in (ZZ, GF(3)):
+        parallel, serial = build_ss(domain), build_ss(domain)
+        p4 = parallel.pages[4].compute_region(box, workers=2)
+        ref = serial.pages[4].compute_region(box)
+
+        assert set(p4.modules) == set(ref.modules)
+        for bideg, module in ref.modules.items():
+            assert p4.modules[bideg].span.coords == module.span.coords
+            assert p4.modules[bideg].relation.coords == module.relation.coords
+            assert p4.modules[bideg].get_structural_information() == module.get_structural_information()
+
+
+def test_worker_failures_fall_back_with_a_warning_and_main_process_errors_propagate(build_ss, monkeypatch):
+    from src import parallel
+    from src.page_and_module import Page
+
+    def no_pool(*args, **kwargs):
+        raise OSError("no processes")
+
+    box = (range(0, 7), range(0, 9))
+    fallback, ref = build_ss(), build_ss()
+    with monkeypatch.context() as m:
+        m.setattr(parallel, "ProcessPoolExecutor", no_pool)
+        with pytest.warns(RuntimeWarning, match="serially"):
+            p4 = fallback.pages[4].compute_region(box, workers=2)
+    for bideg, module in ref.pages[4].compute_region(box).modules.items():
+        assert p4.modules[bideg].get_structural_information() == module.get_structural_information()
+
+    def disk_full(self, bidegree, result):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(Page, "finish_module", disk_full)
+    with pytest.raises(OSError, match="disk full"):
+        build_ss().pages[4].compute_region(box, workers=2)
+
+
+def test_wavefront_overlaps_pages_and_matches_serial_computation(build_ss):
+    c, u = a, t
+
+    def build():
+        # The universal circle bundle over ZZ: d2(u) = c kills everything on E3 except the unit.
+        return build_ss(degrees=[[2, 0], [0, 1]], relations=[u**2], pages=[{c: 0, u: 0}, {u: c, c: 0}, {}, {}])
+
+    box = (range(0, 9), range(0, 3))
+    wavefront, serial = build(), build()
+    p4 = wavefront.pages[4].compute_region(box, workers=2)
+    ref = serial.pages[4].compute_region(box)
+
+    for r in range(1, 5):
+        assert set(wavefront.pages[r].modules) == set(serial.pages[r].modules)
+        for bideg, module in serial.pages[r].modules.items():
+            assert wavefront.pages[r].modules[bideg].span.coords == module.span.coords
+            assert wavefront.pages[r].modules[bideg].relation.coords == module.relation.coords
+    survivors = {b for b, m in p4.modules.items() if m.get_structural_information() not in (None, ([], []))}
+    assert survivors == {ref._normalize_bidegree((0, 0))}
+
+
+def test_memory_budget_spills_modules_and_reloads_them_on_access(tmp_path, build_ss):
+    bounded, ref = build_ss(), build_ss()
+    bounded.set_memory_budget(60, directory=str(tmp_path))
+    box = (range(0, 7), range(0, 9))
+    bounded.pages[4].compute_region(box)
+    ref.pages[4].compute_region(box)
+
+    usage = bounded.memory_usage()
+    assert sum(u["entries"] for u in usage.values()) <= 60
+    assert usage[1]["spilled"] > 0
+    # Differential caches behind the frontier are dropped with the modules spilled there.
+    spilled = bounded.module_store.spilled
+    for r in (1, 2):
+        d = bounded.pages[r].d
+        assert not spilled[r] & (d.diff_span_cache.keys() | d.info_collections.keys())
+    assert sum(u["modules"] + u["spilled"] for u in usage.values()) == sum(len(p.modules) for p in ref.pages[1:])
+
+    for r in range(1, 5):
+        for bideg, module in ref.pages[r].modules.items():
+            reloaded = bounded.pages[r][bideg]
+            assert reloaded.span.coords == module.span.coords
+            assert reloaded.relation.coords == module.relation.coords
+            assert reloaded.get_structural_information() == module.get_structural_information()
+    assert sum(u["entries"] for u in bounded.memory_usage().values()) <= 60
+
+    assert len(os.listdir(tmp_path)) > 0
+    bounded.module_store.close()
+    assert os.listdir(tmp_path) == []
+
+    # A budget set after the modules are computed counts them and spills down to it.
+    late = build_ss()
+    late.pages[4].compute_region(box)
+    late.set_memory_budget(60, directory=str(tmp_path / "late"))
+    assert sum(u["entries"] for u in late.memory_usage().values()) <= 60
+    assert late.memory_usage()[1]["spilled"] > 0
+
+    # A temporary spill directory is removed together with its files.
+    owned = build_ss()
+    owned.set_memory_budget(60)
+    owned.pages[4].compute_region(box)
+    directory = owned.module_store.directory
+    assert len(os.listdir(directory)) > 0
+    owned.module_store.close()
+    assert not os.path.exists(directory)
+
+
+def test_arena_keeps_decompositions_as_machine_integers(tmp_path, build_ss):
+    from src.arena import Arena, ArenaMatrix
+
+    box = (range(0, 7), range(0, 9))
+    for domain in (ZZ, GF(3)):
+        arena = str(tmp_path / f"{domain}.arena")
+        mapped = build_ss(domain, setup=lambda ss: ss.use_arena(arena, min_entries=0))
+        ref = build_ss(domain)
+        p4 = mapped.pages[4].compute_region(box, workers=2)
+        ref.pages[4].compute_region(box)
+
+        assert mapped.arena.size > 0
+        stored = [m.S.stored_decomposition() for m in p4.modules.values() if m.S is not None]
+        assert stored and all(isinstance(m, ArenaMatrix) for parts in stored for m in parts)
+        for bideg, module in ref.pages[4].modules.items():
+            assert p4.modules[bideg].span.coords == module.span.coords
+            assert p4.modules[bideg].get_structural_information() == module.get_structural_information()
+
+    # Entries beyond 64 bits are not stored, and the caller keeps the matrix as it is.
+    arena = Arena(str(tmp_path / "wide.arena"), capacity=1)
+    assert arena.store(DM([[2**70]], ZZ)) is None
+    stored = arena.store(DM([[1, 2], [3, 4]], ZZ))
+    assert stored.to_dmatrix() == DM([[1, 2], [3, 4]], ZZ)
+    # Materialized matrices are cached, and products and diagonals are read from the rows directly.
+    assert stored.to_dmatrix() is stored.to_dmatrix()
+    assert stored.mul(DM([[1], [-1]], ZZ)) == DM([[-1], [-1]], ZZ)
+    assert stored.diagonal() == [ZZ(1), ZZ(4)]
+    assert arena._retired == []
+    arena.close()
+    assert os.path.exists(arena.path)
+
+    # An arena on a temporary file removes it when closed.
+    temp = Arena(capacity=1)
+    assert temp.store(DM([[1, 2], [3, 4]], GF(5))).mul(DM([[1], [1]], GF(5))) == DM([[3], [2]], GF(5))
+    temp.close()
+    assert not os.path.exists(temp.path)
+
+
+def test_divider_factors_the_divisor_once_for_many_dividends(spy):
+    from src.element import HomoElem
+    from src.snf import SNF
+
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(a**2)
+    ss.add_page({a: 0, t: 0})
+    ss.add_page({a: 0, t: 0})
+    page = ss.add_page({t: a, a: 0})
+
+    x = HomoElem(page, t)
+    q_bideg = page._normalize_bidegree((0, 4))
+    divider = page.divider(x, q_bideg)
+    assert page.divider(HomoElem(page, t), q_bideg) is divider
+    divider.divide(HomoElem(page, t**3))
+
+    decompositions = spy(SNF, "decomp")
+    for c in (1, 2, -5):
+        q, K = page.divide(x, HomoElem(page, c * t**3))
+        assert q == HomoElem(page, c * t**2) and K.shape[1] == 0
+    assert decompositions == []
+
+
+def test_division_results_are_memoized_until_modules_are_released():
+    from src.element import HomoElem
+
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(a**2)
+    ss.add_page({a: 0, t: 0})
+    ss.add_page({a: 0, t: 0})
+    page = ss.add_page({t: a, a: 0})
+    page.division_hits = page.division_misses = 0
+
+    first = page.divide(HomoElem(page, 2 * t), HomoElem(page, 4 * t**3))
+    # Equal coordinates are the same division, however the elements were built.
+    assert page.divide(HomoElem(page, t + t), HomoElem(page, 4 * t**3)) is first
+    assert first[0] == HomoElem(page, 2 * t**2)
+    stats = ss.cache_stats()[3]
+    assert (stats["division_hits"], stats["division_misses"], stats["division_hit_rate"]) == (1, 1, 0.5)
+
+    page.release_modules()
+    assert page.divide(HomoElem(page, 2 * t), HomoElem(page, 4 * t**3)) is not first
+    assert page.division_misses == 2
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+from sympy.abc import a, t
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for path in (SRC, ROOT):
+    path_str = str(path)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+from src.differential import Differential  # noqa: E402
+from src.page_and_module import Page  # noqa: E402
+from src.spectral_sequence import SpectralSequence  # noqa: E402
+
+
+@pytest.fixture
+def build(build_ss):
+    def build(store_path, extra_d3=None):
+        pages = [{a: 0, t: 0}, {a: 0, t: 0}, {t: a, a: 0, **(extra_d3 or {})}, {}]
+        return build_ss(pages=pages, setup=lambda ss: ss.use_result_store(str(store_path)))
+
+    return build
+
+
+def test_repeated_runs_are_answered_from_the_result_store(tmp_path, monkeypatch, build):
+    store_path = tmp_path / "results.sqlite"
+    box = (range(0, 7), range(0, 9))
+    first = build(store_path)
+    first.pages[4].compute_region(box)
+    expected = {b: m.get_structural_information() for b, m in first.pages[4].modules.items()}
+
+    def fail(*args):
+        raise AssertionError("recomputed a stored result")
+
+    with monkeypatch.context() as m:
+        m.setattr(Page, "generate_module", fail)
+        m.setattr(Differential, "complete_info_set", fail)
+        m.setattr(SpectralSequence, "get_ker_basis", fail)
+        second = build(store_path)
+        second.pages[4].compute_region(box)
+        assert {b: m.get_structural_information() for b, m in second.pages[4].modules.items()} == expected
+    assert second.result_store.hits > 0
+
+    # Other supplied differentials on page 3 give other keys from page 3 on, while pages 1 and 2 are shared.
+    other = build(store_path, {a * t: 0})
+    assert other.result_store.page_key(other.pages[2]) == second.result_store.page_key(second.pages[2])
+    assert other.result_store.page_key(other.pages[3]) != second.result_store.page_key(second.pages[3])
+
+
+def test_relations_added_after_pages_change_the_keys(tmp_path, build):
+    ss = build(tmp_path / "results.sqlite")
+    spec_key, page_key = ss.result_store.spec_key, ss.result_store.page_key(ss.pages[2])
+
+    # Over ZZ a non-unit relation is still accepted once pages exist, and must not be served old results.
+    ss.kill(2 * a * t)
+    assert ss.result_store.spec_key != spec_key
+    assert ss.result_store.page_key(ss.pages[2]) != page_key
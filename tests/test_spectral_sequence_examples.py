@@ -251,3 +251,27 @@ def test_guide_ground_truth_dimensions_10x10(example_key, stable_page_key, expec
                 f"{example_key} {stable_page_key} wrong dim at ({p},{q}): "
                 f"expected {expected}, got {got}"
             )
+
+
+def test_query_d_runs_long_quotient_chains_without_recursion():
+    import inspect
+    import sys
+
+    from sympy import ZZ
+    from sympy.abc import a, t
+    from src.spectral_sequence import SpectralSequence
+
+    ss = SpectralSequence(ZZ, [a, t], [[3, 0], [0, 2]], [[1, 0], [-1, 1]])
+    ss.kill(a**2)
+    ss.add_page({a: 0, t: 0})
+    ss.add_page({a: 0, t: 0})
+    page = ss.add_page({t: a, a: 0})
+
+    # d(t^60) is found through the quotients t^59, t^58, ..., each queried on the explicit stack.
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 60)
+    try:
+        inferred = page.d.diff_info.query_d(HomoElem(page, t**60))
+    finally:
+        sys.setrecursionlimit(limit)
+    assert inferred == HomoElem(page, 60 * a * t**59)